@@ -0,0 +1,102 @@
+"""
+Compare the client-side and server-side RRF fusion engines.
+
+For every query the script runs search_hybrid_rrf with each engine to measure end-to-end latency, then replays
+the raw Elasticsearch requests each engine issues to measure how many response bytes come back to the app.
+
+Usage:
+    python benchmark_rrf.py --query "What is Docker used for?" --runs 20
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import List, Dict, Optional
+
+from elasticsearch_utils import (init_elasticsearch_client, close_elasticsearch_client, build_bm25_query,
+                                 build_dense_vector_query, build_elser_query, build_server_rrf_query,
+                                 search_hybrid_rrf, rrf_window_size, ES_SEARCH_TIMEOUT)
+
+
+def _response_bytes(response) -> int:
+    return len(json.dumps(response.body).encode("utf-8"))
+
+
+def measure_payload(engine: str, query: str, query_vector: Optional[List[float]], index_name: str, size: int, k: int) -> int:
+    es = init_elasticsearch_client().options(request_timeout=ES_SEARCH_TIMEOUT)
+    search_size = rrf_window_size(size)
+
+    if engine == "server":
+        body = build_server_rrf_query(query, query_vector, size, k, window_size=search_size)
+        return _response_bytes(es.search(index=index_name, body=body))
+
+    bodies = [build_bm25_query(query, search_size, min_score=0.0), build_elser_query(query, search_size, min_score=0.0)]
+    if query_vector:
+        bodies.append(build_dense_vector_query(query_vector, search_size))
+    return sum(_response_bytes(es.search(index=index_name, body=body)) for body in bodies)
+
+
+def benchmark_engine(engine: str, queries: List[str], vectors: Dict[str, Optional[List[float]]], index_name: str,
+                     size: int, k: int, runs: int, mode: str) -> Dict[str, any]:
+    latencies = []
+    failures = 0
+
+    for _ in range(runs):
+        for query in queries:
+            start = time.perf_counter()
+            result = search_hybrid_rrf(query, vectors[query], index_name, size, k, mode=mode, engine=engine)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not result["success"]:
+                failures += 1
+
+    payloads = [measure_payload(engine, query, vectors[query], index_name, size, k) for query in queries]
+    latencies.sort()
+
+    return {
+        "engine": engine,
+        "requests": len(latencies),
+        "failures": failures,
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "avg_payload_kb": round(statistics.mean(payloads) / 1024, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark client-side vs server-side RRF fusion")
+    parser.add_argument("--query", action="append", dest="queries", help="Query to run (repeatable)")
+    parser.add_argument("--index", default="hexaware_chunks")
+    parser.add_argument("--size", type=int, default=5)
+    parser.add_argument("--k", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--mode", default="concurrent", help="Transport for the client engine (concurrent or msearch)")
+    parser.add_argument("--no-dense", action="store_true", help="Skip the kNN leg")
+    args = parser.parse_args()
+
+    queries = args.queries or ["What is Docker used for?", "Explain basic accounting principles"]
+
+    vectors = {query: None for query in queries}
+    if not args.no_dense:
+        from main import generate_query_embedding
+        vectors = {query: generate_query_embedding(query) for query in queries}
+
+    init_elasticsearch_client()
+    try:
+        for engine in ("client", "server"):
+            # Warm up connections and caches before timing
+            search_hybrid_rrf(queries[0], vectors[queries[0]], args.index, args.size, args.k, mode=args.mode, engine=engine)
+
+        results = [benchmark_engine(engine, queries, vectors, args.index, args.size, args.k, args.runs, args.mode)
+                   for engine in ("client", "server")]
+    finally:
+        close_elasticsearch_client()
+
+    print(f"\n{'engine':<8} {'requests':>8} {'failures':>8} {'p50_ms':>9} {'p95_ms':>9} {'mean_ms':>9} {'payload_kb':>11}")
+    for row in results:
+        print(f"{row['engine']:<8} {row['requests']:>8} {row['failures']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+              f"{row['mean_ms']:>9} {row['avg_payload_kb']:>11}")
+
+
+if __name__ == "__main__":
+    main()
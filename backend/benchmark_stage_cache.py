@@ -0,0 +1,114 @@
+"""
+Compare the legacy indented-JSON debug cache with the columnar stage cache for the chunks stage.
+
+Both formats are written from the same chunks to a scratch directory, then each is loaded --runs times and the
+best save/load times and on-disk sizes are reported. Chunks come from an existing legacy cache file (--json) or
+are generated with realistic text lengths and 384-dim vectors.
+
+Usage:
+    python benchmark_stage_cache.py --chunks 20000 --runs 3
+    python benchmark_stage_cache.py --json cache/chunks_result.json
+"""
+import os
+import json
+import random
+import shutil
+import string
+import argparse
+import tempfile
+import time
+from typing import List, Dict
+
+import numpy as np
+
+from stage_cache_utils import save_stage_cache, load_stage_cache, stage_cache_size, STAGE_CACHE_CODEC
+
+
+def generate_chunks(count: int, dims: int = 384, words_per_chunk: int = 220) -> List[Dict]:
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(5000)]
+    vectors = np.random.default_rng(0).standard_normal((count, dims), dtype=np.float32)
+    chunks = []
+    for i in range(count):
+        text = " ".join(rng.choices(vocabulary, k=words_per_chunk))
+        filename = f"document_{i // 40:04d}.pdf"
+        chunk_id = f"{i:040x}"
+        chunks.append({
+            "chunk_id": chunk_id,
+            "doc_id": f"drive-file-{i // 40:04d}",
+            "doc_hash": f"{i // 40:064x}",
+            "content_hash": f"{i:064x}",
+            "filename": filename,
+            "drive_url": f"https://drive.google.com/file/d/drive-file-{i // 40:04d}/view",
+            "raw_text": text,
+            "dense_vector": vectors[i].tolist(),
+            "text_for_elser": text,
+            "metadata": {"filename": filename, "chunk_id": chunk_id, "chunk_index": i % 40 + 1, "total_chunks": 40,
+                         "token_count": words_per_chunk + 60}
+        })
+    return chunks
+
+
+def save_legacy_json(chunks: List[Dict], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"url": "benchmark", "chunks_count": len(chunks), "chunks": chunks}, f, indent=2, ensure_ascii=False)
+
+
+def load_legacy_json(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["chunks"]
+
+
+def load_columnar(path: str) -> List[Dict]:
+    return load_stage_cache(path)["records"]
+
+
+def timed(fn, *args, runs: int = 1) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the legacy JSON cache against the columnar stage cache")
+    parser.add_argument("--json", help="Existing legacy chunks cache to use instead of generated chunks")
+    parser.add_argument("--chunks", type=int, default=10000, help="Number of generated chunks")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    chunks = load_legacy_json(args.json) if args.json else generate_chunks(args.chunks)
+    scratch = tempfile.mkdtemp(prefix="stage_cache_bench_")
+    json_path = os.path.join(scratch, "chunks_result.json")
+    columnar_path = os.path.join(scratch, "chunks_result")
+
+    try:
+        rows = []
+        for name, save, load, path, size in (
+                ("json", save_legacy_json, load_legacy_json, json_path, os.path.getsize),
+                (f"columnar+{STAGE_CACHE_CODEC}",
+                 lambda records, target: save_stage_cache(target, records, vector_field="dense_vector"),
+                 load_columnar, columnar_path, stage_cache_size)):
+            save_seconds = timed(save, chunks, path)
+            load_seconds = timed(load, path, runs=args.runs)
+            rows.append((name, save_seconds, load_seconds, size(path)))
+
+        # Reading every vector once shows the cost of touching the memory-mapped rows after a lazy load
+        records = load_columnar(columnar_path)
+        touch_seconds = timed(lambda: sum(float(record["dense_vector"][0]) for record in records))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    baseline_load, baseline_size = rows[0][2], rows[0][3]
+    print(f"\n{len(chunks)} chunks")
+    print(f"{'format':<16} {'save_s':>8} {'load_s':>8} {'size_mb':>9} {'load_speedup':>13} {'size_ratio':>11}")
+    for name, save_seconds, load_seconds, size in rows:
+        print(f"{name:<16} {save_seconds:>8.2f} {load_seconds:>8.3f} {size / 1024 / 1024:>9.1f} "
+              f"{baseline_load / load_seconds:>12.1f}x {size / baseline_size:>11.3f}")
+    print(f"Reading one value from every memory-mapped vector took {touch_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,158 @@
 import os
-import json
+import threading
 import tiktoken
 from typing import List, Dict
-from datetime import datetime
-from sentence_transformers import SentenceTransformer
+from embedding_utils import get_embedding_model, get_vector_cache, EMBEDDING_MODEL_NAME
+from corpus_utils import content_hash
 
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "300"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(min(os.cpu_count() or 1, 8))))
+CHUNK_ENCODING = "cl100k_base"
+# Bump when chunk boundaries, text or offsets change so cached chunks are not reused
+CHUNKER_VERSION = 3
+
+# UTF-8 continuation bytes; deleting them from a byte string leaves one byte per character
+_UTF8_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+_chunkers = {}
+_chunkers_lock = threading.Lock()
+
+
+class TokenChunker:
+    """
+    Splits text into windows of max_tokens tokens that overlap by overlap_tokens. Each document is encoded
+    once (batches across threads, since tiktoken releases the GIL) and each window is returned as character
+    offsets into the original text, so windows are sliced rather than decoded and never re-encoded to count
+    their tokens.
+    """
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                 encoding_name: str = CHUNK_ENCODING, workers: int = CHUNK_WORKERS):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError(f"overlap_tokens must be between 0 and max_tokens - 1, got {overlap_tokens}")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.workers = max(workers, 1)
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def split(self, text: str) -> List[tuple]:
+        return self.split_many([text])[0]
+
+    def split_many(self, texts: List[str]) -> List[List[tuple]]:
+        """
+        Returns:
+            For each text, a list of (char_start, char_end, token_count) windows
+        """
+        texts = [_valid_utf8(text) for text in texts]
+        token_lists = self.encoding.encode_ordinary_batch(texts, num_threads=self.workers)
+        return [self._windows(text, tokens) for text, tokens in zip(texts, token_lists)]
+
+    def _windows(self, text: str, tokens: List[int]) -> List[tuple]:
+        if len(tokens) <= self.max_tokens:
+            return [(0, len(text), len(tokens))]
+
+        starts = [0]
+        while starts[-1] + self.max_tokens < len(tokens):
+            starts.append(starts[-1] + self.max_tokens - self.overlap_tokens)
+        ends = [min(start + self.max_tokens, len(tokens)) for start in starts]
+
+        offsets = self._char_offsets(text, tokens, sorted(set(starts + ends)))
+        return [(offsets[start], offsets[end], end - start) for start, end in zip(starts, ends)]
+
+    def _char_offsets(self, text: str, tokens: List[int], boundaries: List[int]) -> Dict[int, int]:
+        # Each token is decoded to bytes exactly once, a segment at a time. A boundary inside a multi-byte
+        # character maps to the end of that character, so the window before it keeps the whole character
+        is_ascii = text.isascii()
+        offsets = {0: 0}
+        previous = 0
+        char_offset = 0
+        for boundary in boundaries:
+            if boundary == 0:
+                continue
+            segment = self.encoding.decode_bytes(tokens[previous:boundary])
+            char_offset += len(segment) if is_ascii else len(segment.translate(None, _UTF8_CONTINUATION_BYTES))
+            offsets[boundary] = char_offset
+            previous = boundary
+        return offsets
+
+
+def _valid_utf8(text: str) -> str:
+    # Lone surrogates from PDF text cannot be encoded; replace them the same way tiktoken does
+    try:
+        text.encode("utf-8")
+        return text
+    except UnicodeEncodeError:
+        return text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
 
-def chunk_text_by_tokens(text: str, max_tokens: int = 300, overlap_tokens: int = 50) -> List[str]:
-    encoding = tiktoken.get_encoding("cl100k_base")
-    tokens = encoding.encode(text)
-    
-    if len(tokens) <= max_tokens:
-        return [text]
-    
-    chunks = []
-    start = 0
-    
-    while start < len(tokens):
-        end = min(start + max_tokens, len(tokens))
-        chunk_tokens = tokens[start:end]
-        chunk_text = encoding.decode(chunk_tokens)
-        chunks.append(chunk_text)
-        
-        if end >= len(tokens):
-            break
-            
-        start = end - overlap_tokens
-    
-    return chunks
+
+def get_chunker(max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> TokenChunker:
+    key = (max_tokens, overlap_tokens)
+    with _chunkers_lock:
+        if key not in _chunkers:
+            _chunkers[key] = TokenChunker(max_tokens, overlap_tokens)
+        return _chunkers[key]
+
+
+def make_chunk_id(doc_id: str, chunk_hash: str, occurrence: int = 0) -> str:
+    """
+    Content-based chunk id: the same text in the same source document always gets the same id, so re-ingesting
+    an unchanged chunk is a no-op, while same-named files with different Drive ids never collide.
+    """
+    key = f"{doc_id}\0{chunk_hash}\0{occurrence}"
+    return content_hash(key)[:40]
+
+
+def get_chunking_settings() -> Dict[str, any]:
+    """Settings that change the chunks and their vectors, used to key cached chunking results."""
+    return {"max_tokens": CHUNK_MAX_TOKENS, "overlap_tokens": CHUNK_OVERLAP_TOKENS, "encoding": CHUNK_ENCODING,
+            "chunker_version": CHUNKER_VERSION, "model": EMBEDDING_MODEL_NAME}
+
+
+def chunk_text_by_tokens(text: str, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    text = _valid_utf8(text)
+    return [text[start:end] for start, end, _ in get_chunker(max_tokens, overlap_tokens).split(text)]
 
 
 def create_chunks_from_corpus(corpus: List[Dict[str, str]]) -> List[Dict]:
     all_chunks = []
+    corpus = [corpus_item for corpus_item in corpus if corpus_item.get("corpus", "").strip()]
+    texts = [_valid_utf8(corpus_item["corpus"]) for corpus_item in corpus]
+    windows_per_item = get_chunker().split_many(texts)
     
-    for corpus_item in corpus:
+    for corpus_item, text, windows in zip(corpus, texts, windows_per_item):
         pdf_name = corpus_item.get("pdf_name", "")
         pdf_link = corpus_item.get("pdf_link", "")
-        text = corpus_item.get("corpus", "")
-        
-        if not text.strip():
-            continue
-            
-        text_chunks = chunk_text_by_tokens(text)
+        doc_id = corpus_item.get("doc_id") or pdf_link or pdf_name
+        doc_hash = corpus_item.get("doc_hash") or content_hash(text)
+        seen_hashes = {}
         
-        for i, chunk_text in enumerate(text_chunks):
-            chunk_id = f"{pdf_name.replace('.pdf', '').replace(' ', '_').lower()}_chunk_{i+1:03d}"
+        for i, (char_start, char_end, token_count) in enumerate(windows):
+            window = text[char_start:char_end]
+            chunk_text = window.strip()
+            # Move the offsets past the stripped whitespace so text[char_start:char_end] == raw_text
+            char_start += len(window) - len(window.lstrip())
+            char_end = char_start + len(chunk_text)
+            chunk_hash = content_hash(chunk_text)
+            # Identical chunks within one document get distinct ids by occurrence
+            occurrence = seen_hashes.get(chunk_hash, 0)
+            seen_hashes[chunk_hash] = occurrence + 1
+            chunk_id = make_chunk_id(doc_id, chunk_hash, occurrence)
             
             chunk_doc = {
                 "chunk_id": chunk_id,
+                "doc_id": doc_id,
+                "doc_hash": doc_hash,
+                "content_hash": chunk_hash,
                 "filename": pdf_name,
                 "drive_url": pdf_link,
-                "raw_text": chunk_text.strip(),
-                "text_for_elser": chunk_text.strip(),
+                "raw_text": chunk_text,
+                "text_for_elser": chunk_text,
                 "chunk_index": i + 1,
-                "total_chunks": len(text_chunks),
-                "token_count": len(tiktoken.get_encoding("cl100k_base").encode(chunk_text))
+                "total_chunks": len(windows),
+                "token_count": token_count,
+                "char_start": char_start,
+                "char_end": char_end
             }
             
             all_chunks.append(chunk_doc)
@@ -66,10 +164,19 @@ def add_dense_vectors(chunks: List[Dict]) -> List[Dict]:
     if not chunks:
         return chunks
     
-    model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-    
     texts = [chunk["raw_text"] for chunk in chunks]
-    vectors = model.encode(texts, convert_to_tensor=False)
+    cache = get_vector_cache()
+    vectors = cache.get_many(texts) if cache else [None] * len(texts)
+    
+    # Only texts the cache has never seen for this model are encoded
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        model = get_embedding_model()
+        encoded = model.encode([texts[i] for i in missing], convert_to_tensor=False)
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+        if cache:
+            cache.put_many([texts[i] for i in missing], encoded)
     
     for i, chunk in enumerate(chunks):
         chunk["dense_vector"] = vectors[i].tolist()
@@ -83,6 +190,9 @@ def create_elasticsearch_documents(chunks: List[Dict]) -> List[Dict]:
     for chunk in chunks:
         es_doc = {
             "chunk_id": chunk["chunk_id"],
+            "doc_id": chunk.get("doc_id"),
+            "doc_hash": chunk.get("doc_hash"),
+            "content_hash": chunk.get("content_hash"),
             "filename": chunk["filename"],
             "drive_url": chunk["drive_url"],
             "raw_text": chunk["raw_text"],
@@ -94,7 +204,9 @@ def create_elasticsearch_documents(chunks: List[Dict]) -> List[Dict]:
                 "chunk_id": chunk["chunk_id"],
                 "chunk_index": chunk["chunk_index"],
                 "total_chunks": chunk["total_chunks"],
-                "token_count": chunk["token_count"]
+                "token_count": chunk["token_count"],
+                "char_start": chunk.get("char_start"),
+                "char_end": chunk.get("char_end")
             }
         }
         
@@ -103,38 +215,6 @@ def create_elasticsearch_documents(chunks: List[Dict]) -> List[Dict]:
     return elasticsearch_docs
 
 
-def save_chunks_result(chunks: List[Dict], url: str, debug_file: str = "cache/chunks_result.json"):
-    try:
-        cache_dir = os.path.dirname(debug_file)
-        if cache_dir and not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
-        
-        debug_data = {
-            "timestamp": datetime.now().isoformat(),
-            "url": url,
-            "chunks_count": len(chunks),
-            "total_documents": len(set(chunk["filename"] for chunk in chunks)),
-            "chunks": chunks
-        }
-        
-        with open(debug_file, 'w', encoding='utf-8') as f:
-            json.dump(debug_data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        pass
-
-
-def load_chunks_result(debug_file: str = "cache/chunks_result.json") -> List[Dict]:
-    if not os.path.exists(debug_file):
-        return None
-    
-    try:
-        with open(debug_file, 'r', encoding='utf-8') as f:
-            debug_data = json.load(f)
-            return debug_data.get("chunks")
-    except Exception as e:
-        return None
-
-
 def get_chunks_statistics(chunks: List[Dict]) -> Dict[str, any]:
     if not chunks:
         return {
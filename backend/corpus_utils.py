@@ -1,7 +1,9 @@
-import os
-import json
+import hashlib
 from typing import List, Dict
-from datetime import datetime
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
 def create_corpus_from_extraction(extraction_results: List[Dict]) -> List[Dict[str, str]]:
@@ -9,47 +11,20 @@ def create_corpus_from_extraction(extraction_results: List[Dict]) -> List[Dict[s
     
     for result in extraction_results:
         if result.get("success", False) and result.get("text"):
+            text = result.get("text", "").strip()
             corpus_item = {
                 "pdf_name": result.get("filename", ""),
                 "pdf_link": result.get("download_link", ""),
-                "corpus": result.get("text", "").strip()
+                "corpus": text,
+                # Stable identity of the source file and a hash of its content, used by delta ingest
+                "doc_id": result.get("file_id") or result.get("download_link") or result.get("filename", ""),
+                "doc_hash": result.get("sha256") or content_hash(text)
             }
             corpus.append(corpus_item)
     
     return corpus
 
 
-def save_corpus_result(corpus: List[Dict[str, str]], url: str, debug_file: str = "cache/corpus_result.json"):
-    try:
-        cache_dir = os.path.dirname(debug_file)
-        if cache_dir and not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
-        
-        debug_data = {
-            "timestamp": datetime.now().isoformat(),
-            "url": url,
-            "corpus_count": len(corpus),
-            "corpus": corpus
-        }
-        
-        with open(debug_file, 'w', encoding='utf-8') as f:
-            json.dump(debug_data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        pass
-
-
-def load_corpus_result(debug_file: str = "cache/corpus_result.json") -> List[Dict[str, str]]:
-    if not os.path.exists(debug_file):
-        return None
-    
-    try:
-        with open(debug_file, 'r', encoding='utf-8') as f:
-            debug_data = json.load(f)
-            return debug_data.get("corpus")
-    except Exception as e:
-        return None
-
-
 def create_corpus_summary(corpus: List[Dict[str, str]]) -> Dict[str, any]:
     if not corpus:
         return {
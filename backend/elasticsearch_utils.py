@@ -1,24 +1,121 @@
 import os
+import asyncio
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch import Elasticsearch, AsyncElasticsearch
+from elasticsearch.helpers import bulk, scan
 
 
-def get_elasticsearch_client() -> Elasticsearch:
-    print("Creating Elasticsearch client connection...")
-    es = Elasticsearch(
-        [{'host': 'localhost', 'port': 9200, 'scheme': 'http'}],
-        timeout=30,
-        max_retries=10,
-        retry_on_timeout=True
-    )
+ES_HOSTS = [host.strip() for host in os.getenv("ES_HOSTS", "http://localhost:9200").split(",") if host.strip()]
+ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "10"))
+ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", "30"))
+ES_SEARCH_TIMEOUT = float(os.getenv("ES_SEARCH_TIMEOUT", "10"))
+ES_BULK_TIMEOUT = float(os.getenv("ES_BULK_TIMEOUT", "120"))
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "10"))
+ES_KEEP_ALIVE = os.getenv("ES_KEEP_ALIVE", "true").lower() in ("1", "true", "yes")
+ES_INDEX_VERSIONS_TO_KEEP = max(int(os.getenv("ES_INDEX_VERSIONS_TO_KEEP", "2")), 1)
+INDEX_VERSION_CREATE_ATTEMPTS = 5
+HYBRID_SEARCH_WORKERS = int(os.getenv("HYBRID_SEARCH_WORKERS", "12"))
+HYBRID_MODES = ("concurrent", "msearch")
+RRF_ENGINES = ("client", "server")
+
+_es_client = None
+_async_es_client = None
+_es_client_lock = threading.Lock()
+_search_executor = ThreadPoolExecutor(max_workers=HYBRID_SEARCH_WORKERS, thread_name_prefix="es-search")
+
+
+def _client_options(connections_per_node: int, request_timeout: float, max_retries: int, keep_alive: bool) -> Dict[str, any]:
+    return {
+        "connections_per_node": connections_per_node,
+        "request_timeout": request_timeout,
+        "max_retries": max_retries,
+        "retry_on_timeout": True,
+        "headers": {"Connection": "keep-alive" if keep_alive else "close"}
+    }
+
+
+def create_elasticsearch_client(hosts: Optional[List[str]] = None, connections_per_node: int = ES_CONNECTIONS_PER_NODE,
+                                request_timeout: float = ES_REQUEST_TIMEOUT, max_retries: int = ES_MAX_RETRIES,
+                                keep_alive: bool = ES_KEEP_ALIVE) -> Elasticsearch:
+    """
+    Build a new Elasticsearch client with its own connection pool.
+    
+    Args:
+        hosts: Elasticsearch node URLs (defaults to ES_HOSTS)
+        connections_per_node: Size of the HTTP connection pool kept per node
+        request_timeout: Default timeout in seconds for every request
+        max_retries: Number of retries on connection errors and timeouts
+        keep_alive: Keep idle connections open between requests
+        
+    Returns:
+        Configured Elasticsearch client
+    """
+    hosts = hosts or ES_HOSTS
+    print(f"Creating Elasticsearch client for {hosts} (pool size {connections_per_node}, timeout {request_timeout}s)")
+    es = Elasticsearch(hosts, **_client_options(connections_per_node, request_timeout, max_retries, keep_alive))
     print("Elasticsearch client created successfully")
     return es
 
 
-def create_chunks_index(index_name: str = "hexaware_chunks") -> bool:
+def create_async_elasticsearch_client(hosts: Optional[List[str]] = None, connections_per_node: int = ES_CONNECTIONS_PER_NODE,
+                                      request_timeout: float = ES_REQUEST_TIMEOUT, max_retries: int = ES_MAX_RETRIES,
+                                      keep_alive: bool = ES_KEEP_ALIVE) -> AsyncElasticsearch:
+    hosts = hosts or ES_HOSTS
+    print(f"Creating async Elasticsearch client for {hosts} (pool size {connections_per_node}, timeout {request_timeout}s)")
+    return AsyncElasticsearch(hosts, **_client_options(connections_per_node, request_timeout, max_retries, keep_alive))
+
+
+def init_elasticsearch_client() -> Elasticsearch:
+    global _es_client
+    with _es_client_lock:
+        if _es_client is None:
+            _es_client = create_elasticsearch_client()
+        return _es_client
+
+
+def get_elasticsearch_client() -> Elasticsearch:
+    if _es_client is None:
+        return init_elasticsearch_client()
+    return _es_client
+
+
+def close_elasticsearch_client():
+    global _es_client
+    with _es_client_lock:
+        if _es_client is not None:
+            print("Closing Elasticsearch client connection pool...")
+            _es_client.close()
+            _es_client = None
+
+
+def init_async_elasticsearch_client() -> AsyncElasticsearch:
+    global _async_es_client
+    with _es_client_lock:
+        if _async_es_client is None:
+            _async_es_client = create_async_elasticsearch_client()
+        return _async_es_client
+
+
+def get_async_elasticsearch_client() -> AsyncElasticsearch:
+    if _async_es_client is None:
+        return init_async_elasticsearch_client()
+    return _async_es_client
+
+
+async def close_async_elasticsearch_client():
+    global _async_es_client
+    client, _async_es_client = _async_es_client, None
+    if client is not None:
+        print("Closing async Elasticsearch client connection pool...")
+        await client.close()
+
+
+def create_chunks_index(index_name: str = "hexaware_chunks", meta: Optional[Dict[str, str]] = None) -> bool:
     print(f"Creating Elasticsearch index: {index_name}")
     es = get_elasticsearch_client()
     
@@ -40,6 +137,15 @@ def create_chunks_index(index_name: str = "hexaware_chunks") -> bool:
                 "chunk_id": {
                     "type": "keyword"
                 },
+                "doc_id": {
+                    "type": "keyword"
+                },
+                "doc_hash": {
+                    "type": "keyword"
+                },
+                "content_hash": {
+                    "type": "keyword"
+                },
                 "filename": {
                     "type": "keyword"
                 },
@@ -78,6 +184,12 @@ def create_chunks_index(index_name: str = "hexaware_chunks") -> bool:
                         },
                         "token_count": {
                             "type": "integer"
+                        },
+                        "char_start": {
+                            "type": "integer"
+                        },
+                        "char_end": {
+                            "type": "integer"
                         }
                     }
                 },
@@ -88,20 +200,287 @@ def create_chunks_index(index_name: str = "hexaware_chunks") -> bool:
         }
     }
     
+    if meta:
+        mapping["mappings"]["_meta"] = meta
+
     try:
-        if es.indices.exists(index=index_name):
-            print(f"Index {index_name} already exists, deleting...")
-            es.indices.delete(index=index_name)
-        
+        # An existing index is never deleted here: with concurrent ingests it may be another job's build
         print(f"Creating new index {index_name} with mapping...")
         es.indices.create(index=index_name, body=mapping)
         print(f"Index {index_name} created successfully")
         return True
     except Exception as e:
-        print(f"Error creating index {index_name}: {e}")
+        if getattr(e, "error", None) == "resource_already_exists_exception":
+            print(f"Index {index_name} already exists")
+        else:
+            print(f"Error creating index {index_name}: {e}")
         return False
 
 
+def _index_mappings(es: Elasticsearch, index_name: str) -> Dict:
+    return next(iter(es.indices.get_mapping(index=index_name).values()))["mappings"]
+
+
+def _has_delta_fields(mappings: Dict) -> bool:
+    properties = mappings.get("properties", {})
+    return "doc_id" in properties and "doc_hash" in properties
+
+
+def _index_version(alias: str, index_name: str) -> Optional[int]:
+    prefix = f"{alias}_v"
+    suffix = index_name[len(prefix):]
+    return int(suffix) if index_name.startswith(prefix) and suffix.isdigit() else None
+
+
+def list_index_versions(alias: str = "hexaware_chunks") -> List[str]:
+    """Names of the versioned physical indexes behind alias (alias_v1, alias_v2, ...), oldest first."""
+    es = get_elasticsearch_client()
+    names = [name for name in es.indices.get(index=f"{alias}_v*").keys() if _index_version(alias, name) is not None]
+    return sorted(names, key=lambda name: _index_version(alias, name))
+
+
+def get_alias_targets(alias: str = "hexaware_chunks") -> List[str]:
+    es = get_elasticsearch_client()
+    if not es.indices.exists_alias(name=alias):
+        return []
+    return list(es.indices.get_alias(name=alias).keys())
+
+
+def _live_index(es: Elasticsearch, alias: str) -> Optional[str]:
+    targets = get_alias_targets(alias)
+    if targets:
+        return targets[0]
+    # A concrete index created before versioning still holds the alias name
+    return alias if es.indices.exists(index=alias) else None
+
+
+def get_live_index(alias: str = "hexaware_chunks", require_delta_fields: bool = False,
+                   meta: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Physical index alias currently serves, or None if there is none. With require_delta_fields, an index created
+    before the doc_id/doc_hash fields existed also counts as none, since a delta ingest can't update it in place.
+    With meta, so does an index whose mapping _meta (stamped by create_index_version) does not match it.
+    """
+    es = get_elasticsearch_client()
+    try:
+        live_index = _live_index(es, alias)
+        if not live_index or not (require_delta_fields or meta):
+            return live_index
+        mappings = _index_mappings(es, live_index)
+        if require_delta_fields and not _has_delta_fields(mappings):
+            print(f"{live_index} predates delta ingest fields")
+            return None
+        index_meta = mappings.get("_meta", {})
+        if meta and any(index_meta.get(name) != value for name, value in meta.items()):
+            print(f"{live_index} was built with different settings ({index_meta or 'none recorded'})")
+            return None
+        return live_index
+    except Exception as e:
+        print(f"Error finding the live index behind {alias}: {e}")
+        return None
+
+
+def create_index_version(alias: str = "hexaware_chunks", meta: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Create the next versioned physical index behind alias to build into, while queries keep reading the live one.
+    If a concurrent ingest claims the same version first, the next free one is used. meta is stored as the
+    mapping's _meta, for get_live_index to check before a delta ingest writes into the index.
+
+    Returns:
+        The new index name, or None if it could not be created
+    """
+    es = get_elasticsearch_client()
+    for _ in range(INDEX_VERSION_CREATE_ATTEMPTS):
+        try:
+            versions = [_index_version(alias, name) for name in list_index_versions(alias)]
+        except Exception as e:
+            print(f"Error listing versions of {alias}: {e}")
+            return None
+        index_name = f"{alias}_v{max(versions, default=0) + 1}"
+        if create_chunks_index(index_name, meta):
+            return index_name
+        try:
+            if not es.indices.exists(index=index_name):
+                return None
+        except Exception:
+            return None
+    print(f"Could not claim a new version of {alias} after {INDEX_VERSION_CREATE_ATTEMPTS} attempts")
+    return None
+
+
+def validate_index_version(index_name: str, expected_count: Optional[int] = None) -> Dict[str, any]:
+    es = get_elasticsearch_client()
+    try:
+        es.indices.refresh(index=index_name)
+        document_count = es.count(index=index_name)["count"]
+    except Exception as e:
+        return {"success": False, "message": f"Could not validate {index_name}: {e}", "document_count": 0}
+
+    if document_count == 0:
+        return {"success": False, "message": f"{index_name} is empty", "document_count": 0}
+    if expected_count is not None and document_count != expected_count:
+        return {"success": False, "message": f"{index_name} has {document_count} chunks, expected {expected_count}",
+                "document_count": document_count}
+    return {"success": True, "message": f"{index_name} has {document_count} chunks", "document_count": document_count}
+
+
+def publish_index_version(index_name: str, alias: str = "hexaware_chunks", expected_count: Optional[int] = None,
+                          keep: int = ES_INDEX_VERSIONS_TO_KEEP) -> Dict[str, any]:
+    """
+    Validate a freshly built index version, atomically point alias at it and garbage-collect old versions.
+    A version that fails validation is deleted and the alias keeps serving the previous one.
+
+    Args:
+        index_name: Versioned index returned by create_index_version
+        alias: Read alias that queries use
+        expected_count: Exact number of chunks the build must hold, if known
+        keep: Number of versions to retain, including the live one
+
+    Returns:
+        Dictionary with success, message, the published and previous index names and the removed versions
+    """
+    validation = validate_index_version(index_name, expected_count)
+    if not validation["success"]:
+        print(f"Index validation failed, keeping {alias} on its current version: {validation['message']}")
+        delete_index(index_name)
+        return validation
+
+    es = get_elasticsearch_client()
+    try:
+        previous = get_alias_targets(alias)
+        actions = [{"remove": {"index": target, "alias": alias}} for target in previous]
+        if not previous and es.indices.exists(index=alias):
+            # Drop the pre-versioning concrete index in the same atomic step that creates the alias
+            actions.append({"remove_index": {"index": alias}})
+        actions.append({"add": {"index": index_name, "alias": alias}})
+        es.indices.update_aliases(actions=actions)
+    except Exception as e:
+        print(f"Error switching alias {alias} to {index_name}: {e}")
+        delete_index(index_name)
+        return {"success": False, "message": f"Could not switch alias {alias}: {e}", "document_count": 0}
+
+    print(f"Alias {alias} now points to {index_name} ({validation['document_count']} chunks)")
+    return {
+        "success": True,
+        "message": f"Published {index_name} as {alias}",
+        "index": index_name,
+        "previous_index": previous[0] if previous else None,
+        "document_count": validation["document_count"],
+        "removed_versions": cleanup_index_versions(alias, keep)
+    }
+
+
+def cleanup_index_versions(alias: str = "hexaware_chunks", keep: int = ES_INDEX_VERSIONS_TO_KEEP) -> List[str]:
+    """
+    Delete old versions behind alias, keeping the live one and the keep - 1 newest older ones for rollback.
+    Versions newer than the live one are left alone since another ingest may still be building them.
+    """
+    es = get_elasticsearch_client()
+    try:
+        targets = get_alias_targets(alias)
+        live_version = _index_version(alias, targets[0]) if targets else None
+        if live_version is None:
+            return []
+        older = [name for name in list_index_versions(alias) if _index_version(alias, name) < live_version]
+    except Exception as e:
+        print(f"Error listing versions of {alias}: {e}")
+        return []
+
+    removed = older[:max(len(older) - (keep - 1), 0)]
+    for name in removed:
+        try:
+            es.indices.delete(index=name)
+            print(f"Deleted old index version {name}")
+        except Exception as e:
+            print(f"Error deleting old index version {name}: {e}")
+    return removed
+
+
+def get_indexed_documents(index_name: str = "hexaware_chunks") -> Dict[str, set]:
+    """
+    Map every doc_id in the index to the set of doc_hash values its chunks carry. A document whose chunks
+    all carry the current hash is unchanged; more than one hash means a previous ingest was interrupted.
+    """
+    es = get_elasticsearch_client()
+    documents = {}
+    if not es.indices.exists(index=index_name):
+        return documents
+    
+    after_key = None
+    while True:
+        composite = {
+            "size": 1000,
+            "sources": [{"doc_id": {"terms": {"field": "doc_id"}}}, {"doc_hash": {"terms": {"field": "doc_hash"}}}]
+        }
+        if after_key:
+            composite["after"] = after_key
+        response = es.options(request_timeout=ES_REQUEST_TIMEOUT).search(
+            index=index_name, body={"size": 0, "aggs": {"documents": {"composite": composite}}})
+        agg = response["aggregations"]["documents"]
+        for bucket in agg["buckets"]:
+            documents.setdefault(bucket["key"]["doc_id"], set()).add(bucket["key"]["doc_hash"])
+        after_key = agg.get("after_key")
+        if not agg["buckets"] or not after_key:
+            break
+    
+    print(f"Found {len(documents)} documents already indexed in {index_name}")
+    return documents
+
+
+def get_document_chunk_ids(doc_id: str, index_name: str = "hexaware_chunks") -> set:
+    es = get_elasticsearch_client()
+    query = {"query": {"term": {"doc_id": doc_id}}, "_source": False}
+    return {hit["_id"] for hit in scan(es, index=index_name, query=query)}
+
+
+def delete_chunks(chunk_ids: List[str], index_name: str = "hexaware_chunks") -> int:
+    if not chunk_ids:
+        return 0
+    es = get_elasticsearch_client()
+    actions = ({"_op_type": "delete", "_index": index_name, "_id": chunk_id} for chunk_id in chunk_ids)
+    deleted, _ = bulk(es.options(request_timeout=ES_BULK_TIMEOUT), actions, raise_on_error=False, refresh=True)
+    return deleted
+
+
+def delete_documents(doc_ids: List[str], index_name: str = "hexaware_chunks") -> int:
+    if not doc_ids:
+        return 0
+    es = get_elasticsearch_client()
+    response = es.options(request_timeout=ES_BULK_TIMEOUT).delete_by_query(
+        index=index_name, body={"query": {"terms": {"doc_id": list(doc_ids)}}}, refresh=True, conflicts="proceed")
+    print(f"Deleted {response['deleted']} chunks of {len(doc_ids)} removed documents from {index_name}")
+    return response["deleted"]
+
+
+def update_chunk_fields(chunks: List[Dict], index_name: str = "hexaware_chunks") -> int:
+    """Partially update already indexed chunks (doc_hash, position metadata) without resending their vectors."""
+    if not chunks:
+        return 0
+    es = get_elasticsearch_client()
+    actions = ({
+        "_op_type": "update",
+        "_index": index_name,
+        "_id": chunk["chunk_id"],
+        "doc": {
+            "doc_hash": chunk["doc_hash"],
+            "filename": chunk["filename"],
+            "drive_url": chunk["drive_url"],
+            "metadata": {
+                "filename": chunk["filename"],
+                "drive_url": chunk["drive_url"],
+                "chunk_id": chunk["chunk_id"],
+                "chunk_index": chunk["chunk_index"],
+                "total_chunks": chunk["total_chunks"],
+                "token_count": chunk["token_count"],
+                "char_start": chunk.get("char_start"),
+                "char_end": chunk.get("char_end")
+            }
+        }
+    } for chunk in chunks)
+    updated, _ = bulk(es.options(request_timeout=ES_BULK_TIMEOUT), actions, raise_on_error=False, refresh=True)
+    return updated
+
+
 def index_chunks(chunks: List[Dict], index_name: str = "hexaware_chunks") -> Dict[str, any]:
     print(f"Starting to index {len(chunks)} chunks to {index_name}")
     es = get_elasticsearch_client()
@@ -128,7 +507,7 @@ def index_chunks(chunks: List[Dict], index_name: str = "hexaware_chunks") -> Dic
     
     try:
         print("Starting bulk indexing...")
-        success_count, failed = bulk(es, docs, refresh=True)
+        success_count, failed = bulk(es.options(request_timeout=ES_BULK_TIMEOUT), docs, refresh=True)
         print(f"Bulk indexing completed. Success: {success_count}, Failed: {len(failed)}")
         
         return {
@@ -158,14 +537,17 @@ def get_index_stats(index_name: str = "hexaware_chunks") -> Dict[str, any]:
         stats = es.indices.stats(index=index_name)
         count = es.count(index=index_name)
         doc_count = count['count']
-        size_mb = round(stats['indices'][index_name]['total']['store']['size_in_bytes'] / (1024 * 1024), 2)
+        # index_name may be an alias, so read the totals across the indexes it resolves to
+        size_bytes = stats['_all']['total']['store']['size_in_bytes']
+        size_mb = round(size_bytes / (1024 * 1024), 2)
         
         print(f"Index {index_name} stats: {doc_count} documents, {size_mb} MB")
         
         return {
             "exists": True,
+            "index": ", ".join(stats['indices'].keys()),
             "document_count": doc_count,
-            "index_size_bytes": stats['indices'][index_name]['total']['store']['size_in_bytes'],
+            "index_size_bytes": size_bytes,
             "index_size_mb": size_mb
         }
     except Exception as e:
@@ -185,23 +567,23 @@ def delete_index(index_name: str = "hexaware_chunks") -> bool:
         return False
 
 
-def search_bm25(query: str, index_name: str = "hexaware_chunks", size: int = 5, min_score: float = 0.1) -> Dict[str, any]:
-    """
-    Perform BM25 text search using Elasticsearch match query.
-    
-    Args:
-        query: The search query text
-        index_name: Elasticsearch index name
-        size: Number of results to return
-        min_score: Minimum relevance score threshold
-        
-    Returns:
-        Dictionary containing search results and metadata
-    """
-    print(f"Performing BM25 search for query: '{query}' in index: {index_name}")
-    es = get_elasticsearch_client()
-    
-    search_body = {
+def _format_hit(hit: Dict, include_highlights: bool = False) -> Dict[str, any]:
+    source = hit['_source']
+    result = {
+        "chunk_id": source['chunk_id'],
+        "filename": source['filename'],
+        "drive_url": source.get('drive_url', ''),
+        "raw_text": source['raw_text'][:500] + "..." if len(source['raw_text']) > 500 else source['raw_text'],
+        "score": hit.get('_score'),
+        "metadata": source.get('metadata', {})
+    }
+    if include_highlights:
+        result["highlights"] = hit.get('highlight', {})
+    return result
+
+
+def build_bm25_query(query: str, size: int = 5, min_score: float = 0.1) -> Dict[str, any]:
+    return {
         "query": {
             "bool": {
                 "should": [
@@ -239,22 +621,63 @@ def search_bm25(query: str, index_name: str = "hexaware_chunks", size: int = 5,
             }
         }
     }
+
+
+def build_dense_vector_query(query_vector: List[float], size: int = 5) -> Dict[str, any]:
+    return {
+        "knn": {
+            "field": "dense_vector",
+            "query_vector": query_vector,
+            "k": size,
+            "num_candidates": size * 10
+        },
+        "size": size,
+        "_source": {
+            "excludes": ["dense_vector"]
+        }
+    }
+
+
+def build_elser_query(query: str, size: int = 5, min_score: float = 0.1) -> Dict[str, any]:
+    return {
+        "query": {
+            "text_expansion": {
+                "text_for_elser": {
+                    "model_id": ".elser_model_2",
+                    "model_text": query
+                }
+            }
+        },
+        "size": size,
+        "min_score": min_score,
+        "_source": {
+            "excludes": ["dense_vector", "text_for_elser"]
+        }
+    }
+
+
+def search_bm25(query: str, index_name: str = "hexaware_chunks", size: int = 5, min_score: float = 0.1) -> Dict[str, any]:
+    """
+    Perform BM25 text search using Elasticsearch match query.
+    
+    Args:
+        query: The search query text
+        index_name: Elasticsearch index name
+        size: Number of results to return
+        min_score: Minimum relevance score threshold
+        
+    Returns:
+        Dictionary containing search results and metadata
+    """
+    print(f"Performing BM25 search for query: '{query}' in index: {index_name}")
+    es = get_elasticsearch_client()
+    
+    search_body = build_bm25_query(query, size, min_score)
     
     try:
-        response = es.search(index=index_name, body=search_body)
+        response = es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
         
-        results = []
-        for hit in response['hits']['hits']:
-            result = {
-                "chunk_id": hit['_source']['chunk_id'],
-                "filename": hit['_source']['filename'],
-                "drive_url": hit['_source'].get('drive_url', ''),
-                "raw_text": hit['_source']['raw_text'][:500] + "..." if len(hit['_source']['raw_text']) > 500 else hit['_source']['raw_text'],
-                "score": hit['_score'],
-                "metadata": hit['_source'].get('metadata', {}),
-                "highlights": hit.get('highlight', {})
-            }
-            results.append(result)
+        results = [_format_hit(hit, include_highlights=True) for hit in response['hits']['hits']]
         
         print(f"BM25 search completed. Found {len(results)} results")
         
@@ -302,33 +725,12 @@ def search_dense_vector(query_vector: List[float], index_name: str = "hexaware_c
             "results": []
         }
     
-    search_body = {
-        "knn": {
-            "field": "dense_vector",
-            "query_vector": query_vector,
-            "k": size,
-            "num_candidates": size * 10
-        },
-        "size": size,
-        "_source": {
-            "excludes": ["dense_vector"]
-        }
-    }
+    search_body = build_dense_vector_query(query_vector, size)
     
     try:
-        response = es.search(index=index_name, body=search_body)
+        response = es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
         
-        results = []
-        for hit in response['hits']['hits']:
-            result = {
-                "chunk_id": hit['_source']['chunk_id'],
-                "filename": hit['_source']['filename'],
-                "drive_url": hit['_source'].get('drive_url', ''),
-                "raw_text": hit['_source']['raw_text'][:500] + "..." if len(hit['_source']['raw_text']) > 500 else hit['_source']['raw_text'],
-                "score": hit['_score'],
-                "metadata": hit['_source'].get('metadata', {})
-            }
-            results.append(result)
+        results = [_format_hit(hit) for hit in response['hits']['hits']]
         
         print(f"Dense vector search completed. Found {len(results)} results")
         
@@ -368,36 +770,12 @@ def search_elser(query: str, index_name: str = "hexaware_chunks", size: int = 5,
     print(f"Performing ELSER search for query: '{query}' in index: {index_name}")
     es = get_elasticsearch_client()
     
-    search_body = {
-        "query": {
-            "text_expansion": {
-                "text_for_elser": {
-                    "model_id": ".elser_model_2",
-                    "model_text": query
-                }
-            }
-        },
-        "size": size,
-        "min_score": min_score,
-        "_source": {
-            "excludes": ["dense_vector", "text_for_elser"]
-        }
-    }
+    search_body = build_elser_query(query, size, min_score)
     
     try:
-        response = es.search(index=index_name, body=search_body)
+        response = es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
         
-        results = []
-        for hit in response['hits']['hits']:
-            result = {
-                "chunk_id": hit['_source']['chunk_id'],
-                "filename": hit['_source']['filename'],
-                "drive_url": hit['_source'].get('drive_url', ''),
-                "raw_text": hit['_source']['raw_text'][:500] + "..." if len(hit['_source']['raw_text']) > 500 else hit['_source']['raw_text'],
-                "score": hit['_score'],
-                "metadata": hit['_source'].get('metadata', {})
-            }
-            results.append(result)
+        results = [_format_hit(hit) for hit in response['hits']['hits']]
         
         print(f"ELSER search completed. Found {len(results)} results")
         
@@ -436,74 +814,48 @@ def calculate_rrf_score(rank: int, k: int = 60) -> float:
     return 1.0 / (k + rank + 1)
 
 
-def search_hybrid_rrf(query: str, query_vector: Optional[List[float]] = None, index_name: str = "hexaware_chunks", 
-                     size: int = 5, k: int = 60) -> Dict[str, any]:
+def fuse_rrf_results(leg_results: Dict[str, Dict], size: int = 5, k: int = 60) -> tuple[List[Dict], int]:
     """
-    Perform hybrid search using Reciprocal Rank Fusion (RRF) to combine BM25, dense vector, and ELSER search results.
+    Fuse ranked result lists from several search legs with Reciprocal Rank Fusion.
     
     Args:
-        query: The search query text
-        query_vector: Optional query embedding vector for dense search
-        index_name: Elasticsearch index name
-        size: Number of final results to return
+        leg_results: Mapping of leg name (bm25, dense, elser) to that leg's search result
+        size: Number of fused results to return
         k: RRF constant (typically 60)
         
     Returns:
-        Dictionary containing RRF-ranked search results and metadata
+        Tuple of (fused results, number of distinct candidates)
     """
-    print(f"Performing RRF hybrid search for query: '{query}' in index: {index_name}")
-    
-    search_size = min(size * 3, 50)  # Get more results for better RRF
-    
-    bm25_results = search_bm25(query, index_name, search_size, min_score=0.0)
-    bm25_chunks = {result['chunk_id']: {'result': result, 'rank': i} 
-                   for i, result in enumerate(bm25_results.get('results', []))}
-    
-    dense_chunks = {}
-    if query_vector and len(query_vector) == 384:
-        dense_results = search_dense_vector(query_vector, index_name, search_size)
-        dense_chunks = {result['chunk_id']: {'result': result, 'rank': i} 
-                       for i, result in enumerate(dense_results.get('results', []))}
-    
-    elser_results = search_elser(query, index_name, search_size, min_score=0.0)
-    elser_chunks = {result['chunk_id']: {'result': result, 'rank': i} 
-                   for i, result in enumerate(elser_results.get('results', []))}
+    leg_ranks = {
+        leg: {result['chunk_id']: {'result': result, 'rank': i}
+              for i, result in enumerate(leg_result.get('results', []))}
+        for leg, leg_result in leg_results.items()
+    }
     
     all_chunks = set()
-    all_chunks.update(bm25_chunks.keys())
-    all_chunks.update(dense_chunks.keys())
-    all_chunks.update(elser_chunks.keys())
+    for ranks in leg_ranks.values():
+        all_chunks.update(ranks.keys())
+    
+    source_priority = [leg for leg in ("elser", "dense", "bm25") if leg in leg_ranks]
     
     rrf_scores = {}
     for chunk_id in all_chunks:
         rrf_score = 0.0
-        
-        if chunk_id in bm25_chunks:
-            rrf_score += calculate_rrf_score(bm25_chunks[chunk_id]['rank'], k)
-        
-        if chunk_id in dense_chunks:
-            rrf_score += calculate_rrf_score(dense_chunks[chunk_id]['rank'], k)
-        
-        if chunk_id in elser_chunks:
-            rrf_score += calculate_rrf_score(elser_chunks[chunk_id]['rank'], k)
+        for ranks in leg_ranks.values():
+            if chunk_id in ranks:
+                rrf_score += calculate_rrf_score(ranks[chunk_id]['rank'], k)
         
         result_data = None
-        if chunk_id in elser_chunks:
-            result_data = elser_chunks[chunk_id]['result']
-        elif chunk_id in dense_chunks:
-            result_data = dense_chunks[chunk_id]['result']
-        elif chunk_id in bm25_chunks:
-            result_data = bm25_chunks[chunk_id]['result']
+        for leg in source_priority:
+            if chunk_id in leg_ranks[leg]:
+                result_data = leg_ranks[leg][chunk_id]['result']
+                break
         
         if result_data:
             rrf_scores[chunk_id] = {
                 'rrf_score': rrf_score,
                 'result': result_data,
-                'found_in': {
-                    'bm25': chunk_id in bm25_chunks,
-                    'dense': chunk_id in dense_chunks,
-                    'elser': chunk_id in elser_chunks
-                }
+                'found_in': {leg: chunk_id in leg_ranks.get(leg, {}) for leg in ("bm25", "dense", "elser")}
             }
     
     sorted_results = sorted(rrf_scores.items(), key=lambda x: x[1]['rrf_score'], reverse=True)[:size]
@@ -515,26 +867,378 @@ def search_hybrid_rrf(query: str, query_vector: Optional[List[float]] = None, in
         result['found_in'] = data['found_in']
         final_results.append(result)
     
-    print(f"RRF hybrid search completed. Found {len(final_results)} results")
+    return final_results, len(all_chunks)
+
+
+def _timed_search(search_fn, *args, **kwargs) -> Dict[str, any]:
+    start = time.perf_counter()
+    result = search_fn(*args, **kwargs)
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def rrf_window_size(size: int) -> int:
+    # Each leg fetches extra candidates for better fusion, but never fewer than size (rank.rrf rejects window_size < size)
+    return max(size, min(size * 3, 50))
+
+
+def _hybrid_legs(query: str, query_vector: Optional[List[float]], search_size: int) -> List[tuple]:
+    legs = [("bm25", build_bm25_query(query, search_size, min_score=0.0), True)]
+    if query_vector and len(query_vector) == 384:
+        legs.append(("dense", build_dense_vector_query(query_vector, search_size), False))
+    legs.append(("elser", build_elser_query(query, search_size, min_score=0.0), False))
+    return legs
+
+
+def _msearch_body(legs: List[tuple], index_name: str) -> List[Dict]:
+    searches = []
+    for _, body, _ in legs:
+        searches.append({"index": index_name})
+        searches.append(body)
+    return searches
+
+
+def _parse_msearch_response(legs: List[tuple], response, elapsed_ms: float) -> Dict[str, Dict]:
+    leg_results = {}
+    for (leg, _, include_highlights), leg_response in zip(legs, response['responses']):
+        if 'error' in leg_response:
+            error = leg_response['error']
+            print(f"Error in {leg} msearch leg: {error}")
+            leg_results[leg] = {
+                "success": False,
+                "search_type": leg,
+                "error": str(error.get('reason', error) if isinstance(error, dict) else error),
+                "results": [],
+                "elapsed_ms": elapsed_ms
+            }
+            continue
+        
+        leg_results[leg] = {
+            "success": True,
+            "search_type": leg,
+            "total_hits": leg_response['hits']['total']['value'],
+            "max_score": leg_response['hits']['max_score'],
+            "results": [_format_hit(hit, include_highlights) for hit in leg_response['hits']['hits']],
+            "took_ms": leg_response['took'],
+            "elapsed_ms": elapsed_ms
+        }
+    
+    return leg_results
+
+
+def _msearch_legs(query: str, query_vector: Optional[List[float]], index_name: str, search_size: int) -> Dict[str, Dict]:
+    es = get_elasticsearch_client()
+    legs = _hybrid_legs(query, query_vector, search_size)
+    
+    start = time.perf_counter()
+    try:
+        response = es.options(request_timeout=ES_SEARCH_TIMEOUT).msearch(searches=_msearch_body(legs, index_name))
+    except Exception as e:
+        print(f"Error performing hybrid msearch: {e}")
+        return {leg: {"success": False, "search_type": leg, "error": str(e), "results": []} for leg, _, _ in legs}
+    
+    return _parse_msearch_response(legs, response, round((time.perf_counter() - start) * 1000, 2))
+
+
+def _concurrent_legs(query: str, query_vector: Optional[List[float]], index_name: str, search_size: int) -> Dict[str, Dict]:
+    futures = {
+        "bm25": _search_executor.submit(_timed_search, search_bm25, query, index_name, search_size, min_score=0.0),
+        "elser": _search_executor.submit(_timed_search, search_elser, query, index_name, search_size, min_score=0.0)
+    }
+    if query_vector and len(query_vector) == 384:
+        futures["dense"] = _search_executor.submit(_timed_search, search_dense_vector, query_vector, index_name, search_size)
+    
+    return {leg: future.result() for leg, future in futures.items()}
+
+
+def build_server_rrf_query(query: str, query_vector: Optional[List[float]] = None, size: int = 5, k: int = 60,
+                           window_size: int = 15) -> Dict[str, any]:
+    """
+    Build a single search body that lets Elasticsearch fuse BM25, ELSER and kNN with its native RRF ranker.
+    
+    Args:
+        query: The search query text
+        query_vector: Optional query embedding vector for the kNN retriever
+        size: Number of fused hits to return
+        k: RRF rank constant
+        window_size: Number of candidates each retriever contributes to fusion
+        
+    Returns:
+        Search body using sub_searches and rank.rrf
+    """
+    search_body = {
+        "sub_searches": [
+            {"query": build_bm25_query(query)["query"]},
+            {"query": build_elser_query(query)["query"]}
+        ],
+        "rank": {
+            "rrf": {
+                "window_size": window_size,
+                "rank_constant": k
+            }
+        },
+        "size": size,
+        "_source": {
+            "excludes": ["dense_vector", "text_for_elser"]
+        }
+    }
+    
+    if query_vector and len(query_vector) == 384:
+        search_body["knn"] = {
+            "field": "dense_vector",
+            "query_vector": query_vector,
+            "k": window_size,
+            "num_candidates": window_size * 10
+        }
+    
+    return search_body
+
+
+def _server_rrf_result(query: str, k: int, response, start: float) -> Dict[str, any]:
+    results = []
+    for hit in response['hits']['hits']:
+        result = _format_hit(hit)
+        result['rrf_rank'] = hit.get('_rank')
+        results.append(result)
+    took_ms = round((time.perf_counter() - start) * 1000, 2)
+    
+    print(f"Server-side RRF search completed in {took_ms} ms. Found {len(results)} results")
+    
+    return {
+        "success": True,
+        "search_type": "hybrid_rrf",
+        "fusion_engine": "server",
+        "query": query,
+        "rrf_k": k,
+        "total_hits": response['hits']['total']['value'],
+        "results": results,
+        "es_took_ms": response['took'],
+        "took_ms": took_ms
+    }
+
+
+def _server_rrf_error(query: str, error: Exception) -> Dict[str, any]:
+    print(f"Error performing server-side RRF search: {error}")
+    return {
+        "success": False,
+        "search_type": "hybrid_rrf",
+        "fusion_engine": "server",
+        "query": query,
+        "error": str(error),
+        "results": []
+    }
+
+
+def search_rrf_server(query: str, query_vector: Optional[List[float]] = None, index_name: str = "hexaware_chunks",
+                      size: int = 5, k: int = 60) -> Dict[str, any]:
+    """
+    Perform hybrid search with RRF fusion done inside Elasticsearch, returning only the top `size` hits.
+    Note: rank.rrf requires a license level that includes it (trial or platinum and above).
+    
+    Args:
+        query: The search query text
+        query_vector: Optional query embedding vector for dense search
+        index_name: Elasticsearch index name
+        size: Number of final results to return
+        k: RRF constant (typically 60)
+        
+    Returns:
+        Dictionary containing RRF-ranked search results and metadata
+    """
+    print(f"Performing server-side RRF search for query: '{query}' in index: {index_name}")
+    es = get_elasticsearch_client()
+    
+    search_body = build_server_rrf_query(query, query_vector, size, k, window_size=rrf_window_size(size))
+    start = time.perf_counter()
+    
+    try:
+        response = es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
+        return _server_rrf_result(query, k, response, start)
+    except Exception as e:
+        return _server_rrf_error(query, e)
+
+
+def _validate_hybrid_options(query: str, mode: str, engine: str) -> Optional[Dict[str, any]]:
+    if engine not in RRF_ENGINES:
+        error = f"Invalid fusion engine: {engine}. Supported engines: {', '.join(RRF_ENGINES)}"
+    elif mode not in HYBRID_MODES:
+        error = f"Invalid hybrid mode: {mode}. Supported modes: {', '.join(HYBRID_MODES)}"
+    else:
+        return None
+    
+    return {
+        "success": False,
+        "search_type": "hybrid_rrf",
+        "query": query,
+        "error": error,
+        "results": []
+    }
+
+
+def _hybrid_rrf_result(query: str, mode: str, size: int, k: int, leg_results: Dict[str, Dict], start: float) -> Dict[str, any]:
+    final_results, total_candidates = fuse_rrf_results(leg_results, size, k)
+    took_ms = round((time.perf_counter() - start) * 1000, 2)
+    
+    print(f"RRF hybrid search completed in {took_ms} ms. Found {len(final_results)} results")
     
     return {
         "success": True,
         "search_type": "hybrid_rrf",
+        "fusion_engine": "client",
+        "hybrid_mode": mode,
         "query": query,
         "rrf_k": k,
-        "total_candidates": len(all_chunks),
+        "total_candidates": total_candidates,
         "search_stats": {
-            "bm25_results": len(bm25_results.get('results', [])),
-            "dense_results": len(dense_results.get('results', [])) if query_vector else 0,
-            "elser_results": len(elser_results.get('results', []))
+            "bm25_results": len(leg_results["bm25"].get('results', [])),
+            "dense_results": len(leg_results["dense"].get('results', [])) if "dense" in leg_results else 0,
+            "elser_results": len(leg_results["elser"].get('results', []))
+        },
+        "leg_timings": {
+            leg: {
+                "took_ms": leg_result.get('took_ms', 0),
+                "elapsed_ms": leg_result.get('elapsed_ms', 0)
+            }
+            for leg, leg_result in leg_results.items()
         },
         "results": final_results,
-        "took_ms": (bm25_results.get('took_ms', 0) + 
-                   (dense_results.get('took_ms', 0) if query_vector else 0) + 
-                   elser_results.get('took_ms', 0))
+        "took_ms": took_ms
     }
 
 
+def search_hybrid_rrf(query: str, query_vector: Optional[List[float]] = None, index_name: str = "hexaware_chunks", 
+                     size: int = 5, k: int = 60, mode: str = "concurrent", engine: str = "client") -> Dict[str, any]:
+    """
+    Perform hybrid search using Reciprocal Rank Fusion (RRF) to combine BM25, dense vector, and ELSER search results.
+    In "concurrent" mode the legs run as separate requests on a bounded thread pool, so latency follows the slowest
+    leg rather than their sum. In "msearch" mode all legs are packed into a single _msearch round trip.
+    With engine="server" fusion is delegated to Elasticsearch (see search_rrf_server) and mode is ignored.
+    
+    Args:
+        query: The search query text
+        query_vector: Optional query embedding vector for dense search
+        index_name: Elasticsearch index name
+        size: Number of final results to return
+        k: RRF constant (typically 60)
+        mode: How the legs are sent to Elasticsearch, one of HYBRID_MODES
+        engine: Where fusion happens, one of RRF_ENGINES
+        
+    Returns:
+        Dictionary containing RRF-ranked search results and metadata
+    """
+    invalid = _validate_hybrid_options(query, mode, engine)
+    if invalid:
+        return invalid
+    
+    if engine == "server":
+        return search_rrf_server(query, query_vector, index_name, size, k)
+    
+    print(f"Performing RRF hybrid search ({mode}) for query: '{query}' in index: {index_name}")
+    
+    search_size = rrf_window_size(size)
+    start = time.perf_counter()
+    
+    if mode == "msearch":
+        leg_results = _msearch_legs(query, query_vector, index_name, search_size)
+    else:
+        leg_results = _concurrent_legs(query, query_vector, index_name, search_size)
+    
+    return _hybrid_rrf_result(query, mode, size, k, leg_results, start)
+
+
+async def _async_search_leg(search_type: str, search_body: Dict, index_name: str, include_highlights: bool = False) -> Dict[str, any]:
+    es = get_async_elasticsearch_client()
+    start = time.perf_counter()
+    
+    try:
+        response = await es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
+    except Exception as e:
+        print(f"Error performing {search_type} search: {e}")
+        return {
+            "success": False,
+            "search_type": search_type,
+            "error": str(e),
+            "results": []
+        }
+    
+    results = [_format_hit(hit, include_highlights) for hit in response['hits']['hits']]
+    print(f"{search_type} search completed. Found {len(results)} results")
+    
+    return {
+        "success": True,
+        "search_type": search_type,
+        "total_hits": response['hits']['total']['value'],
+        "max_score": response['hits']['max_score'],
+        "results": results,
+        "took_ms": response['took'],
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+
+async def async_search_elser(query: str, index_name: str = "hexaware_chunks", size: int = 5, min_score: float = 0.1) -> Dict[str, any]:
+    """
+    Non-blocking variant of search_elser using the shared AsyncElasticsearch client.
+    """
+    print(f"Performing async ELSER search for query: '{query}' in index: {index_name}")
+    result = await _async_search_leg("elser", build_elser_query(query, size, min_score), index_name)
+    result["query"] = query
+    return result
+
+
+async def async_search_hybrid_rrf(query: str, query_vector: Optional[List[float]] = None, index_name: str = "hexaware_chunks",
+                                  size: int = 5, k: int = 60, mode: str = "concurrent", engine: str = "client") -> Dict[str, any]:
+    """
+    Non-blocking variant of search_hybrid_rrf. The legs are awaited together with asyncio.gather (or sent as one
+    _msearch), so the event loop keeps serving other requests while Elasticsearch works.
+    
+    Args:
+        query: The search query text
+        query_vector: Optional query embedding vector for dense search
+        index_name: Elasticsearch index name
+        size: Number of final results to return
+        k: RRF constant (typically 60)
+        mode: How the legs are sent to Elasticsearch, one of HYBRID_MODES
+        engine: Where fusion happens, one of RRF_ENGINES
+        
+    Returns:
+        Dictionary containing RRF-ranked search results and metadata
+    """
+    invalid = _validate_hybrid_options(query, mode, engine)
+    if invalid:
+        return invalid
+    
+    es = get_async_elasticsearch_client()
+    search_size = rrf_window_size(size)
+    start = time.perf_counter()
+    
+    if engine == "server":
+        print(f"Performing async server-side RRF search for query: '{query}' in index: {index_name}")
+        search_body = build_server_rrf_query(query, query_vector, size, k, window_size=search_size)
+        try:
+            response = await es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
+            return _server_rrf_result(query, k, response, start)
+        except Exception as e:
+            return _server_rrf_error(query, e)
+    
+    print(f"Performing async RRF hybrid search ({mode}) for query: '{query}' in index: {index_name}")
+    legs = _hybrid_legs(query, query_vector, search_size)
+    
+    if mode == "msearch":
+        try:
+            response = await es.options(request_timeout=ES_SEARCH_TIMEOUT).msearch(searches=_msearch_body(legs, index_name))
+            leg_results = _parse_msearch_response(legs, response, round((time.perf_counter() - start) * 1000, 2))
+        except Exception as e:
+            print(f"Error performing hybrid msearch: {e}")
+            leg_results = {leg: {"success": False, "search_type": leg, "error": str(e), "results": []} for leg, _, _ in legs}
+    else:
+        responses = await asyncio.gather(*[
+            _async_search_leg(leg, body, index_name, include_highlights) for leg, body, include_highlights in legs
+        ])
+        leg_results = {leg: leg_result for (leg, _, _), leg_result in zip(legs, responses)}
+    
+    return _hybrid_rrf_result(query, mode, size, k, leg_results, start)
+
+
 def search_hybrid(query: str, query_vector: Optional[List[float]] = None, index_name: str = "hexaware_chunks", 
                  size: int = 5, bm25_weight: float = 0.2, dense_weight: float = 0.3, elser_weight: float = 0.5) -> Dict[str, any]:
     """
@@ -622,7 +1326,7 @@ def search_hybrid(query: str, query_vector: Optional[List[float]] = None, index_
         }
     
     try:
-        response = es.search(index=index_name, body=search_body)
+        response = es.options(request_timeout=ES_SEARCH_TIMEOUT).search(index=index_name, body=search_body)
         
         results = []
         for hit in response['hits']['hits']:
@@ -0,0 +1,272 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import List, Dict, Callable, Optional, TYPE_CHECKING
+from vector_cache_utils import VectorCache, EMBEDDING_CACHE_ENABLED
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "0"))  # seconds, 0 disables expiry
+
+_models = {}
+_model_stats = {}
+_models_lock = threading.Lock()
+_vector_caches = {}
+
+
+def get_embedding_model(model_name: str = EMBEDDING_MODEL_NAME) -> "SentenceTransformer":
+    """
+    Return the process-wide SentenceTransformer for model_name, loading it exactly once.
+    Shared by ingest (chunk vectors) and query (question vectors). sentence_transformers (and torch) is
+    imported here rather than at module level, so processes that import this module without embedding,
+    such as spawned PDF/OCR workers re-importing the launch script, never load it.
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            print(f"Loading embedding model: {model_name}")
+            start = time.perf_counter()
+            _models[model_name] = SentenceTransformer(model_name)
+            load_ms = round((time.perf_counter() - start) * 1000, 2)
+            _model_stats[model_name] = {"load_ms": load_ms, "loaded_at": time.time(), "warmup_ms": None}
+            print(f"Embedding model {model_name} loaded in {load_ms} ms")
+        return _models[model_name]
+
+
+def warm_up_embedding_model(model_name: str = EMBEDDING_MODEL_NAME) -> Dict[str, any]:
+    model = get_embedding_model(model_name)
+    start = time.perf_counter()
+    model.encode(["warm up"])
+    warmup_ms = round((time.perf_counter() - start) * 1000, 2)
+    _model_stats[model_name]["warmup_ms"] = warmup_ms
+    print(f"Embedding model {model_name} warmed up in {warmup_ms} ms")
+    return get_model_registry_stats()[model_name]
+
+
+def get_model_registry_stats() -> Dict[str, Dict]:
+    return {name: dict(stats) for name, stats in _model_stats.items()}
+
+
+def get_vector_cache(model_name: str = EMBEDDING_MODEL_NAME) -> Optional[VectorCache]:
+    """Return the persistent chunk embedding cache for model_name, or None when EMBEDDING_CACHE_ENABLED is off."""
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    with _models_lock:
+        if model_name not in _vector_caches:
+            _vector_caches[model_name] = VectorCache(model_name)
+        return _vector_caches[model_name]
+
+
+def get_vector_cache_stats() -> Dict[str, Dict]:
+    with _models_lock:
+        caches = list(_vector_caches.values())
+    return {cache.model_id: cache.get_stats() for cache in caches}
+
+
+def close_vector_caches():
+    with _models_lock:
+        caches = list(_vector_caches.values())
+        _vector_caches.clear()
+    for cache in caches:
+        cache.close()
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of query vectors keyed by (model id, normalized question), with optional TTL expiry.
+    """
+
+    def __init__(self, model_id: str, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE, ttl_seconds: float = QUERY_EMBEDDING_CACHE_TTL):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _key(self, query: str) -> tuple:
+        return (self.model_id, normalize_query(query))
+
+    def get(self, query: str) -> Optional[List[float]]:
+        key = self._key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            vector, stored_at = entry
+            if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return vector
+
+    def put(self, query: str, vector: List[float]):
+        if self.max_entries <= 0 or vector is None:
+            return
+
+        key = self._key(query)
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "model_id": self.model_id,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+
+class EmbeddingBatcher:
+    """
+    Collects query texts that arrive within a short window (or until max_batch_size is reached)
+    and encodes them with a single model call, resolving each caller's future with its own vector.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], List[List[float]]], max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 window_ms: float = EMBEDDING_BATCH_WINDOW_MS, executor: Optional[Executor] = None):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+        self.executor = executor
+        self._queue = None
+        self._worker = None
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "max_batch_size": 0,
+            "total_queue_wait_ms": 0.0,
+            "max_queue_wait_ms": 0.0,
+            "total_encode_ms": 0.0,
+            "errors": 0
+        }
+
+        print(f"Initialized embedding batcher (max batch {max_batch_size}, window {window_ms} ms)")
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def embed(self, text: str) -> List[float]:
+        if self._worker is None:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Anything already waiting rides along without extending the window
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect_batch()
+            texts = [text for text, _, _ in batch]
+            dispatched_at = time.perf_counter()
+
+            waits = [(dispatched_at - enqueued_at) * 1000 for _, _, enqueued_at in batch]
+            self._stats["batches"] += 1
+            self._stats["items"] += len(batch)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            self._stats["total_queue_wait_ms"] += sum(waits)
+            self._stats["max_queue_wait_ms"] = max(self._stats["max_queue_wait_ms"], max(waits))
+
+            try:
+                vectors = await loop.run_in_executor(self.executor, self.encode_fn, texts)
+            except Exception as e:
+                print(f"Error encoding embedding batch of {len(batch)}: {e}")
+                self._stats["errors"] += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._stats["total_encode_ms"] += (time.perf_counter() - dispatched_at) * 1000
+
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def get_stats(self) -> Dict[str, any]:
+        batches = self._stats["batches"]
+        items = self._stats["items"]
+        return {
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": round(items / batches, 2) if batches else 0,
+            "max_batch_size": self._stats["max_batch_size"],
+            "avg_queue_wait_ms": round(self._stats["total_queue_wait_ms"] / items, 2) if items else 0,
+            "max_queue_wait_ms": round(self._stats["max_queue_wait_ms"], 2),
+            "avg_encode_ms": round(self._stats["total_encode_ms"] / batches, 2) if batches else 0,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "errors": self._stats["errors"]
+        }
@@ -1,7 +1,33 @@
 import os
-import requests
 import re
-from typing import List, Dict
+import time
+import random
+import hashlib
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from manifest_utils import DownloadManifest
+
+DRIVE_DOWNLOAD_URL = os.getenv("DRIVE_DOWNLOAD_URL", "https://drive.google.com/uc?export=download")
+DRIVE_DOWNLOAD_WORKERS = int(os.getenv("DRIVE_DOWNLOAD_WORKERS", "8"))
+DRIVE_CONNECT_TIMEOUT = float(os.getenv("DRIVE_CONNECT_TIMEOUT", "10"))
+DRIVE_READ_TIMEOUT = float(os.getenv("DRIVE_READ_TIMEOUT", "60"))
+DRIVE_MAX_RETRIES = int(os.getenv("DRIVE_MAX_RETRIES", "4"))
+DRIVE_BACKOFF_SECONDS = float(os.getenv("DRIVE_BACKOFF_SECONDS", "1"))
+DRIVE_CHUNK_SIZE = 1024 * 1024
+CONFIRM_PAGE_MAX_BYTES = 256 * 1024
+DRIVE_SKIP_UNCHANGED = os.getenv("DRIVE_SKIP_UNCHANGED", "true").lower() == "true"
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+DRIVE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+_session = None
+_session_lock = threading.Lock()
+_download_stats = {"files": 0, "failed": 0, "bytes": 0, "seconds": 0.0, "retries": 0, "skipped": 0, "bytes_skipped": 0, "deduplicated": 0}
+_download_stats_lock = threading.Lock()
+_manifest = None
 
 
 def extract_folder_id_from_url(folder_url: str) -> str:
@@ -22,10 +48,7 @@ def get_files_from_folder(folder_url: str) -> List[Dict[str, str]]:
 
         
         folder_id = extract_folder_id_from_url(folder_url)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(folder_url, headers=headers)
+        response = get_drive_session().get(folder_url, timeout=(DRIVE_CONNECT_TIMEOUT, DRIVE_READ_TIMEOUT))
 
         
         if response.status_code != 200:
@@ -85,44 +108,314 @@ def get_files_from_folder(folder_url: str) -> List[Dict[str, str]]:
         return []
 
 
-def download_file(file_id: str, file_name: str, download_folder: str) -> tuple[bool, str]:
+def get_drive_session() -> requests.Session:
+    """
+    Return the shared HTTP session used for Drive downloads, creating it on first use.
+    Its connection pool is sized for DRIVE_DOWNLOAD_WORKERS concurrent downloads.
+    """
+    global _session
+    
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=DRIVE_DOWNLOAD_WORKERS, pool_maxsize=DRIVE_DOWNLOAD_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.headers.update(DRIVE_HEADERS)
+        return _session
+
+
+def close_drive_session():
+    global _session
+    
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_download_manifest() -> DownloadManifest:
+    global _manifest
+    
+    with _session_lock:
+        if _manifest is None:
+            _manifest = DownloadManifest()
+        return _manifest
+
+
+def flush_download_manifest():
+    if _manifest is not None:
+        _manifest.flush()
+
+
+def _count(**counts):
+    with _download_stats_lock:
+        for name, value in counts.items():
+            _download_stats[name] += value
+
+
+def _record_download(bytes_downloaded: int, seconds: float, success: bool, retries: int):
+    with _download_stats_lock:
+        _download_stats["files"] += 1 if success else 0
+        _download_stats["failed"] += 0 if success else 1
+        _download_stats["bytes"] += bytes_downloaded
+        _download_stats["seconds"] += seconds
+        _download_stats["retries"] += retries
+
+
+def get_download_stats() -> Dict[str, any]:
+    with _download_stats_lock:
+        stats = dict(_download_stats)
+    return {
+        "workers": DRIVE_DOWNLOAD_WORKERS,
+        "files": stats["files"],
+        "failed": stats["failed"],
+        "retries": stats["retries"],
+        "skipped_unchanged": stats["skipped"],
+        "mb_skipped": round(stats["bytes_skipped"] / 1024 / 1024, 2),
+        "deduplicated": stats["deduplicated"],
+        "mb": round(stats["bytes"] / 1024 / 1024, 2),
+        "mb_per_worker_sec": round(stats["bytes"] / 1024 / 1024 / stats["seconds"], 2) if stats["seconds"] else 0
+    }
+
+
+def _read_leading_bytes(response: requests.Response, limit: int) -> bytes:
+    window = b""
+    for chunk in response.iter_content(chunk_size=DRIVE_CHUNK_SIZE):
+        window += chunk
+        if len(window) >= limit:
+            break
+    return window[:limit]
+
+
+def _is_file_response(response: requests.Response) -> bool:
+    if "attachment" in response.headers.get("Content-Disposition", ""):
+        return True
+    return "text/html" not in response.headers.get("Content-Type", "")
+
+
+def _open_download(session: requests.Session, file_id: str, offset: int, if_range: Optional[str] = None) -> requests.Response:
+    """
+    Open a streaming download for file_id, following Drive's virus scan confirm page when one is served.
+    Only headers are inspected for real files; an HTML page is read up to CONFIRM_PAGE_MAX_BYTES, never the body of a file.
+    A non-zero offset requests the rest of the file, and if_range (an ETag or Last-Modified value) makes the server
+    send the whole file instead when it no longer matches.
+    """
+    url = f"{DRIVE_DOWNLOAD_URL}&id={file_id}"
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if if_range:
+            headers["If-Range"] = if_range
+    response = session.get(url, stream=True, headers=headers, timeout=(DRIVE_CONNECT_TIMEOUT, DRIVE_READ_TIMEOUT))
+    if response.status_code != 200 or _is_file_response(response):
+        return response
+    
+    # Large files get an HTML virus scan warning page instead of the file
+    page = _read_leading_bytes(response, CONFIRM_PAGE_MAX_BYTES).decode("utf-8", errors="ignore")
+    response.close()
+    token_match = re.search(r'name="confirm" value="([^"]+)"', page)
+    if not token_match:
+        raise PermissionError("Drive returned an HTML page instead of the file")
+    
+    url = f"{DRIVE_DOWNLOAD_URL}&confirm={token_match.group(1)}&id={file_id}"
+    uuid_match = re.search(r'name="uuid" value="([^"]+)"', page)
+    if uuid_match:
+        url += f"&uuid={uuid_match.group(1)}"
+    return session.get(url, stream=True, headers=headers, timeout=(DRIVE_CONNECT_TIMEOUT, DRIVE_READ_TIMEOUT))
+
+
+def _hash_existing(part_path: str):
+    digest = hashlib.sha256()
+    with open(part_path, "rb") as f:
+        for block in iter(lambda: f.read(DRIVE_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest
+
+
+def _validators(response: requests.Response) -> Dict[str, Optional[str]]:
+    return {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+
+def _probe_remote(session: requests.Session, file_id: str) -> Optional[Dict]:
+    """
+    Fetch size and validators for file_id without downloading it: a HEAD request, or, when Drive answers
+    with its confirm page, the headers of the confirmed GET, closed before the body is read.
+    Returns None if the probe is inconclusive.
+    """
     try:
+        response = session.head(f"{DRIVE_DOWNLOAD_URL}&id={file_id}", allow_redirects=True,
+                                timeout=(DRIVE_CONNECT_TIMEOUT, DRIVE_READ_TIMEOUT))
+        if response.status_code != 200 or not _is_file_response(response):
+            response = _open_download(session, file_id, 0)
+            response.close()
+        if response.status_code != 200 or not _is_file_response(response):
+            return None
+        size = response.headers.get("Content-Length")
+        return {"size": int(size) if size is not None else None, **_validators(response)}
+    except (requests.RequestException, PermissionError, ValueError):
+        return None
 
-        os.makedirs(download_folder, exist_ok=True)
-        
-        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
 
-        
-        session = requests.Session()
-        response = session.get(download_url, stream=True)
+def _is_unchanged(entry: Optional[Dict], remote: Optional[Dict]) -> bool:
+    if not entry or not remote or not os.path.exists(entry["local_path"]):
+        return False
+    if os.path.getsize(entry["local_path"]) != entry["size"]:
+        return False
+    if remote["etag"] and entry.get("etag"):
+        return remote["etag"] == entry["etag"]
+    # Without an ETag, require both size and Last-Modified to match
+    return bool(remote["last_modified"]) and remote["last_modified"] == entry.get("last_modified") and remote["size"] == entry["size"]
 
-        
-        if 'virus scan warning' in response.text.lower():
-            token_match = re.search(r'name="confirm" value="([^"]+)"', response.text)
-            if token_match:
-                token = token_match.group(1)
-                download_url = f"https://drive.google.com/uc?export=download&confirm={token}&id={file_id}"
 
-                response = session.get(download_url, stream=True)
+def _hard_link(source: str, target: str) -> bool:
+    """Make target a hard link to source, replacing it. Returns False if the filesystem can't link."""
+    tmp_path = target + ".link"
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.link(source, tmp_path)
+        os.replace(tmp_path, target)
+        return True
+    except OSError:
+        return False
 
-        
-        file_path = os.path.join(download_folder, file_name)
 
+def _download_attempt(session: requests.Session, file_id: str, file_path: str, part_path: str, state: Dict[str, any]) -> str:
+    """
+    Download (or resume) file_id into part_path in fixed-size chunks, hashing as it writes, then atomically move
+    it to file_path. Memory use is one chunk regardless of file size. Adds received bytes to state["bytes"]
+    and stores the response's ETag/Last-Modified and the file's total size in state.
+    A partial file is only resumed against the validator of the response that wrote it, so bytes of two remote
+    versions are never spliced together.
+    Returns the SHA-256 hex digest of the complete file; raises on anything worth retrying.
+    """
+    validator = state["etag"] or state["last_modified"]
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) and validator else 0
+    
+    with _open_download(session, file_id, offset, if_range=validator) as response:
+        if response.status_code == 416 and offset and offset == state["size"]:
+            # Nothing left to fetch: the partial file already holds the whole file
+            digest = _hash_existing(part_path)
+            os.replace(part_path, file_path)
+            return digest.hexdigest()
+        if response.status_code == 416:
+            os.remove(part_path)
+            raise requests.HTTPError("Requested range not satisfiable, restarting from the beginning", response=response)
+        if response.status_code in RETRYABLE_STATUS:
+            raise requests.HTTPError(f"Retryable status {response.status_code}", response=response)
+        if response.status_code not in (200, 206):
+            raise PermissionError(f"Download failed with status {response.status_code}")
         
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=32768):
+        state.update(_validators(response))
+        # A 200 means the server ignored the Range header or the file changed (If-Range mismatch), so start over
+        resuming = response.status_code == 206
+        digest = _hash_existing(part_path) if resuming else hashlib.sha256()
+        expected = response.headers.get("Content-Length")
+        state["size"] = (offset if resuming else 0) + int(expected) if expected is not None else None
+        received = 0
+        
+        with open(part_path, "ab" if resuming else "wb") as f:
+            for chunk in response.iter_content(chunk_size=DRIVE_CHUNK_SIZE):
                 if chunk:
                     f.write(chunk)
+                    digest.update(chunk)
+                    received += len(chunk)
+                    state["bytes"] += len(chunk)
         
-        file_size = os.path.getsize(file_path)
+        if expected is not None and received < int(expected):
+            raise requests.exceptions.ChunkedEncodingError(f"Connection closed after {received} of {expected} bytes")
+    
+    os.replace(part_path, file_path)
+    return digest.hexdigest()
 
-        return True, file_path
-        
-    except Exception as e:
-        return False, ""
+
+def _skip_if_unchanged(session: requests.Session, file_id: str, file_name: str, file_path: str) -> Optional[Dict]:
+    manifest = get_download_manifest()
+    entry = manifest.get(file_id)
+    if not entry or not os.path.exists(entry["local_path"]):
+        return None
+    if not _is_unchanged(entry, _probe_remote(session, file_id)):
+        return None
+    
+    # Same content, possibly under a new name
+    if entry["local_path"] != file_path and not _hard_link(entry["local_path"], file_path):
+        return None
+    manifest.record(file_id, file_name, file_path, entry["size"], entry["sha256"], entry.get("etag"), entry.get("last_modified"))
+    _count(skipped=1, bytes_skipped=entry["size"])
+    print(f"Skipping unchanged file {file_name}")
+    return {"success": True, "local_path": file_path, "sha256": entry["sha256"], "bytes": 0, "skipped": True}
 
 
-def download_all_files_from_folder(folder_url: str, download_folder: str = "downloads") -> Dict[str, any]:
+def _deduplicate(sha256: str, file_path: str):
+    # Identical content under another name: keep one copy on disk and hard-link the other name to it
+    existing = get_download_manifest().find_by_hash(sha256, exclude_path=file_path)
+    if existing and not os.path.samefile(existing, file_path) and _hard_link(existing, file_path):
+        _count(deduplicated=1)
+        print(f"Deduplicated {os.path.basename(file_path)} against {existing}")
+
+
+def download_drive_file(file_id: str, file_name: str, download_folder: str, skip_unchanged: bool = DRIVE_SKIP_UNCHANGED) -> Dict[str, any]:
+    """
+    Download one Drive file with timeouts, exponential-backoff retries and HTTP Range resume.
+    Data streams to a .part file in fixed-size chunks and is renamed into place only once complete.
+    Completed files are recorded in the download manifest, and content already on disk under another
+    name is hard-linked instead of stored twice.
+    
+    Args:
+        file_id: Google Drive file id
+        file_name: Drive file name; the file is saved as <file_id>_<file_name>, so files sharing a name never share a path
+        download_folder: Local folder for downloaded files
+        skip_unchanged: Probe the remote file first and skip the download if the manifest shows an identical local copy
+    
+    Returns:
+        Dictionary with success, local_path, sha256, bytes received and whether the download was skipped
+    """
+    os.makedirs(download_folder, exist_ok=True)
+    file_path = os.path.join(download_folder, f"{file_id}_{file_name}")
+    part_path = file_path + ".part"
+    session = get_drive_session()
+    start = time.perf_counter()
+    state = {"bytes": 0, "etag": None, "last_modified": None, "size": None}
+    
+    if skip_unchanged:
+        skipped = _skip_if_unchanged(session, file_id, file_name, file_path)
+        if skipped:
+            return skipped
+    
+    # A partial file left by an earlier run can't be matched to the remote version it came from, so start over
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    
+    for attempt in range(DRIVE_MAX_RETRIES + 1):
+        try:
+            sha256 = _download_attempt(session, file_id, file_path, part_path, state)
+            _record_download(state["bytes"], time.perf_counter() - start, True, attempt)
+            _deduplicate(sha256, file_path)
+            get_download_manifest().record(file_id, file_name, file_path, os.path.getsize(file_path), sha256,
+                                           state["etag"], state["last_modified"])
+            return {"success": True, "local_path": file_path, "sha256": sha256, "bytes": state["bytes"], "skipped": False}
+        except PermissionError as e:
+            print(f"Download of {file_name} failed: {e}")
+            break
+        except (requests.RequestException, OSError) as e:
+            if attempt == DRIVE_MAX_RETRIES:
+                print(f"Download of {file_name} failed after {attempt + 1} attempts: {e}")
+                break
+            delay = DRIVE_BACKOFF_SECONDS * (2 ** attempt) * (0.5 + random.random())
+            print(f"Download of {file_name} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+    
+    _record_download(state["bytes"], time.perf_counter() - start, False, attempt)
+    return {"success": False, "local_path": "", "sha256": None, "bytes": state["bytes"], "skipped": False}
+
+
+def download_file(file_id: str, file_name: str, download_folder: str) -> tuple[bool, str]:
+    result = download_drive_file(file_id, file_name, download_folder)
+    return result["success"], result["local_path"]
+
+
+def download_all_files_from_folder(folder_url: str, download_folder: str = "downloads", workers: int = DRIVE_DOWNLOAD_WORKERS) -> Dict[str, any]:
     try:
 
         
@@ -136,24 +429,33 @@ def download_all_files_from_folder(folder_url: str, download_folder: str = "down
                 "files": []
             }
         
-        downloaded_count = 0
+        start = time.perf_counter()
+        bytes_before = _download_stats["bytes"]
         
-        for i, file_info in enumerate(files):
-
-            success, local_path = download_file(file_info["id"], file_info["name"], download_folder)
-            if success:
-                downloaded_count += 1
-                file_info["local_path"] = local_path
-
-            else:
-                file_info["local_path"] = ""
+        def download(file_info: Dict[str, str]) -> bool:
+            result = download_drive_file(file_info["id"], file_info["name"], download_folder)
+            file_info["local_path"] = result["local_path"]
+            file_info["sha256"] = result["sha256"]
+            return result["success"]
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drive-download") as executor:
+            downloaded_count = sum(executor.map(download, files))
+        flush_download_manifest()
+        
+        elapsed = time.perf_counter() - start
+        mb_downloaded = (_download_stats["bytes"] - bytes_before) / 1024 / 1024
+        mb_per_sec = round(mb_downloaded / elapsed, 2) if elapsed > 0 else 0
+        print(f"Downloaded {downloaded_count}/{len(files)} files ({mb_downloaded:.1f} MB) in {elapsed:.1f}s at {mb_per_sec} MB/s")
         
         if downloaded_count > 0:
             return {
                 "success": True,
                 "message": f"Downloaded {downloaded_count} PDF files",
                 "count": downloaded_count,
-                "files": files
+                "files": files,
+                "mb_downloaded": round(mb_downloaded, 2),
+                "elapsed_seconds": round(elapsed, 2),
+                "mb_per_sec": mb_per_sec
             }
         else:
             return {
@@ -169,4 +471,4 @@ def download_all_files_from_folder(folder_url: str, download_folder: str = "down
             "message": "Error processing folder",
             "count": 0,
             "files": []
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,137 @@
+import os
+import uuid
+import threading
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Callable, Optional
+
+from ingest_pipeline import IngestProgress
+
+INGEST_MAX_CONCURRENT_JOBS = int(os.getenv("INGEST_MAX_CONCURRENT_JOBS", "1"))
+INGEST_JOB_RETENTION = int(os.getenv("INGEST_JOB_RETENTION", "50"))
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+DETAIL_SECTIONS = ("files", "extracted_texts", "corpus", "chunks")
+
+
+class IngestJob:
+    def __init__(self, google_drive_url: str, keep_details: bool = False, mode: str = "delta"):
+        self.job_id = uuid.uuid4().hex
+        self.google_drive_url = google_drive_url
+        self.keep_details = keep_details
+        self.mode = mode
+        self.status = "queued"
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = IngestProgress()
+        self.cancel_event = threading.Event()
+        self.result = None
+        self.details = {}
+        self.error = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, any]:
+        job = {
+            "job_id": self.job_id,
+            "google_drive_url": self.google_drive_url,
+            "mode": self.mode,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_event.is_set(),
+            "progress": self.progress.to_dict(),
+            "details_available": {section: len(items) for section, items in self.details.items()},
+            "error": self.error
+        }
+        if include_result:
+            job["result"] = self.result
+        return job
+
+
+class IngestJobManager:
+    """
+    Runs ingest jobs in the background on a bounded thread pool and keeps their status for polling.
+    run_fn(job) does the actual work using the job's url, progress and cancel_event, returns the summary
+    result and may fill job.details with per-file and per-chunk lists keyed by DETAIL_SECTIONS.
+    """
+
+    def __init__(self, run_fn: Callable[[IngestJob], Dict], max_concurrent_jobs: int = INGEST_MAX_CONCURRENT_JOBS,
+                 retention: int = INGEST_JOB_RETENTION):
+        self.run_fn = run_fn
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="ingest-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, google_drive_url: str, keep_details: bool = False, mode: str = "delta") -> IngestJob:
+        job = IngestJob(google_drive_url, keep_details, mode)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        print(f"Queued ingest job {job.job_id} for URL: {google_drive_url}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if not job.finished:
+            print(f"Cancelling ingest job {job_id}")
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+        return job
+
+    def shutdown(self):
+        for job in self.list_jobs():
+            if not job.finished:
+                job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: IngestJob):
+        if job.cancel_event.is_set():
+            return
+
+        job.status = "running"
+        job.started_at = datetime.now()
+        job.progress.started_at = job.started_at.timestamp()
+        print(f"Starting ingest job {job.job_id}")
+
+        try:
+            job.result = self.run_fn(job)
+            if job.cancel_event.is_set():
+                job.status = "cancelled"
+            elif (job.result or {}).get("status") == "error":
+                # The run returned normally but nothing usable came out of it (e.g. the download failed)
+                job.error = job.result.get("message")
+                job.status = "failed"
+            else:
+                job.status = "completed"
+        except Exception as e:
+            print(f"Ingest job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now()
+            print(f"Ingest job {job.job_id} finished with status: {job.status}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.retention, 0)]:
+            del self._jobs[job_id]
@@ -0,0 +1,458 @@
+import os
+import json
+import time
+import hashlib
+import queue
+import threading
+from typing import List, Dict, Callable, Iterable, Optional
+
+from google_drive_utils import get_files_from_folder, download_drive_file, flush_download_manifest, DRIVE_DOWNLOAD_WORKERS
+from pdf_utils import (extract_text_from_files_list, extraction_to_dict, extraction_succeeded, get_extraction_settings,
+                       PDF_EXTRACT_WORKERS)
+from corpus_utils import create_corpus_from_extraction
+from chunking_utils import create_chunks_from_corpus, add_dense_vectors, create_elasticsearch_documents, get_chunking_settings, CHUNK_WORKERS
+from elasticsearch_utils import (create_index_version, publish_index_version, delete_index, get_live_index, index_chunks,
+                                 get_indexed_documents, get_document_chunk_ids, delete_chunks, delete_documents,
+                                 update_chunk_fields)
+from stage_cache_utils import cached_stage, stage_cache_key
+
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+INGEST_BULK_BATCH_SIZE = int(os.getenv("INGEST_BULK_BATCH_SIZE", "500"))
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "5"))
+INGEST_DOWNLOAD_WORKERS = int(os.getenv("INGEST_DOWNLOAD_WORKERS", str(DRIVE_DOWNLOAD_WORKERS)))
+# Extract threads only wait on the PDF process pool, so match its size to keep every worker busy
+INGEST_EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", str(PDF_EXTRACT_WORKERS)))
+# Each chunk worker tokenizes one document; tiktoken releases the GIL, so these threads run in parallel
+INGEST_CHUNK_WORKERS = int(os.getenv("INGEST_CHUNK_WORKERS", str(CHUNK_WORKERS)))
+
+_DONE = object()
+
+
+def get_index_meta() -> Dict[str, str]:
+    """
+    Mapping _meta stamped on every index build: a hash of the extraction and chunking settings (embedding model
+    included) its chunks were made with. Delta ingest only writes into an index with the current hash, so a
+    settings change never mixes chunks or vectors from different settings.
+    """
+    settings = {**get_extraction_settings(), **get_chunking_settings()}
+    settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return {"ingest_settings_hash": settings_hash}
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items_out: int, busy_seconds: float, error: bool = False):
+        with self._lock:
+            self.items_in += 1
+            self.items_out += items_out
+            self.busy_seconds += busy_seconds
+            if error:
+                self.errors += 1
+
+    def to_dict(self) -> Dict[str, any]:
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3)
+        }
+
+
+class IngestProgress:
+    """
+    Thread-safe counters describing how far an ingest run has got, with derived throughput rates.
+    """
+
+    COUNTERS = ("files_total", "files_downloaded", "files_failed", "documents_unchanged", "documents_extracted",
+                "pages_extracted", "pages_ocr", "chunks_created", "chunks_unchanged", "chunks_embedded", "chunks_indexed",
+                "chunks_deleted")
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stage = "queued"
+        self._counts = {name: 0 for name in self.COUNTERS}
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] += value
+
+    def set(self, **counts):
+        with self._lock:
+            self._counts.update(counts)
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counts[name]
+
+    def to_dict(self) -> Dict[str, any]:
+        with self._lock:
+            counts = dict(self._counts)
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        return {
+            "stage": self.stage,
+            **counts,
+            "elapsed_seconds": round(elapsed, 2),
+            "rates": {
+                "files_downloaded_per_sec": round(counts["files_downloaded"] / elapsed, 3),
+                "pages_extracted_per_sec": round(counts["pages_extracted"] / elapsed, 3),
+                "pages_ocr_per_sec": round(counts["pages_ocr"] / elapsed, 3),
+                "chunks_embedded_per_sec": round(counts["chunks_embedded"] / elapsed, 3),
+                "chunks_indexed_per_sec": round(counts["chunks_indexed"] / elapsed, 3)
+            }
+        }
+
+
+class _Stage:
+    """
+    Runs fn over every item of in_queue on `workers` threads and puts each produced item on out_queue.
+    fn returns an iterable of outputs, so a stage can drop (empty list), pass through or fan out items.
+    The sentinel is forwarded once the last worker drains its input. Once cancel_event is set, remaining
+    items are drained without being processed.
+    """
+
+    def __init__(self, name: str, fn: Callable[[any], Iterable], in_queue: queue.Queue, out_queue: Optional[queue.Queue],
+                 workers: int = 1, cancel_event: Optional[threading.Event] = None):
+        self.name = name
+        self.cancel_event = cancel_event
+        self.fn = fn
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stats = StageStats(name)
+        self._remaining = workers
+        self._remaining_lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._work, name=f"ingest-{name}-{i}", daemon=True) for i in range(workers)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            item = self.in_queue.get()
+            if item is _DONE:
+                # Let sibling workers see the sentinel too
+                self.in_queue.put(_DONE)
+                break
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                continue
+
+            start = time.perf_counter()
+            outputs = []
+            error = False
+            try:
+                outputs = list(self.fn(item))
+            except Exception as e:
+                print(f"Ingest stage '{self.name}' failed on item: {e}")
+                error = True
+            self.stats.record(len(outputs), time.perf_counter() - start, error)
+
+            if self.out_queue is not None:
+                for output in outputs:
+                    self.out_queue.put(output)
+
+        with self._remaining_lock:
+            self._remaining -= 1
+            last_worker = self._remaining == 0
+        if last_worker and self.out_queue is not None:
+            self.out_queue.put(_DONE)
+
+
+def run_streaming_ingest(folder_url: str, index_name: str = "hexaware_chunks", download_folder: str = "downloads",
+                         load_to_elasticsearch: bool = True, bulk_batch_size: int = INGEST_BULK_BATCH_SIZE,
+                         queue_size: int = INGEST_QUEUE_SIZE, progress: Optional[IngestProgress] = None,
+                         cancel_event: Optional[threading.Event] = None, collect_details: bool = False,
+                         delta: bool = False) -> Dict[str, any]:
+    """
+    Ingest a Google Drive folder with every document flowing through download -> extract -> chunk -> embed -> index
+    on its own. Stages are threads connected by bounded queues, so memory is bounded by the queue sizes rather than
+    the folder size, and chunks are bulk-indexed in batches of bulk_batch_size as soon as they are embedded.
+
+    Args:
+        folder_url: Public Google Drive folder URL
+        index_name: Read alias queries use. A full ingest builds a new version behind it (index_name_v{n}) and
+            switches the alias to it only once the build is complete and validated; a delta ingest updates the
+            live index in place
+        download_folder: Local folder for downloaded files
+        load_to_elasticsearch: Index chunks; when False the pipeline stops after embedding
+        bulk_batch_size: Number of chunks per bulk request
+        queue_size: Capacity of each inter-stage queue
+        progress: Optional progress object updated as documents move through the stages
+        cancel_event: Optional event; once set, stages stop picking up new work
+        collect_details: Keep every extraction result, corpus item and chunk document for later inspection.
+            Off by default because it holds the whole folder in memory
+        delta: Only apply what changed to the live index. Files whose content hash matches the indexed doc_hash are
+            skipped after download; for changed files only new chunks are embedded and indexed, their stale chunks are
+            deleted once the new ones are in, and documents no longer in the folder are removed. Falls back to a full
+            build when there is no live index with the delta fields, or it was built with other settings
+
+    Returns:
+        Dictionary with per-file download results, pipeline counters, per-stage stats and, when
+        collect_details is set, the collected extracted_texts, corpus and chunks
+    """
+    print(f"Starting streaming ingest for URL: {folder_url}")
+    start = time.perf_counter()
+    progress = progress or IngestProgress()
+    cancel_event = cancel_event or threading.Event()
+
+    progress.stage = "listing"
+    files = get_files_from_folder(folder_url)
+    progress.set(files_total=len(files))
+    if not files:
+        return {
+            "success": False,
+            "cancelled": False,
+            "message": "No files found in folder",
+            "files": [],
+            "documents_processed": 0,
+            "extracted_count": 0,
+            "corpus_count": 0,
+            "chunks_count": 0,
+            "indexed_count": 0,
+            "elasticsearch_status": "not attempted",
+            "stages": {},
+            "details": None
+        }
+
+    # Delta upserts and deletes are per document and go straight to the live index; only a full ingest builds
+    # a new version, so a routine ingest costs what changed rather than the size of the corpus
+    build_index = None
+    target_index = None
+    index_meta = get_index_meta()
+    delta = delta and load_to_elasticsearch
+    if delta:
+        target_index = get_live_index(index_name, require_delta_fields=True, meta=index_meta)
+        if not target_index:
+            print(f"No live index behind {index_name} can be updated in place, running a full build instead")
+            delta = False
+    if load_to_elasticsearch and not delta:
+        build_index = target_index = create_index_version(index_name, meta=index_meta)
+        if not build_index:
+            print(f"Could not create a new version of {index_name}, continuing without Elasticsearch indexing")
+            load_to_elasticsearch = False
+
+    indexed_documents = {}
+    if delta:
+        try:
+            indexed_documents = get_indexed_documents(target_index)
+        except Exception as e:
+            print(f"Could not read indexed documents, treating every file as new: {e}")
+
+    download_queue = queue.Queue()
+    extract_queue = queue.Queue(maxsize=queue_size)
+    chunk_queue = queue.Queue(maxsize=queue_size)
+    embed_queue = queue.Queue(maxsize=queue_size)
+    index_queue = queue.Queue(maxsize=queue_size)
+
+    counters = {"index_failed": 0, "first_indexed_seconds": None}
+    counters_lock = threading.Lock()
+    index_errors = []
+    details = {"extracted_texts": [], "corpus": [], "chunks": []} if collect_details else None
+    details_lock = threading.Lock()
+
+    def collect(section: str, items: List[Dict]):
+        if details is not None:
+            with details_lock:
+                details[section].extend(items)
+
+    def download(file_info: Dict) -> List[Dict]:
+        result = download_drive_file(file_info["id"], file_info["name"], download_folder)
+        success = result["success"]
+        file_info["local_path"] = result["local_path"]
+        file_info["sha256"] = result["sha256"]
+        progress.add(files_downloaded=1 if success else 0, files_failed=0 if success else 1)
+        if success and delta and indexed_documents.get(file_info["id"]) == {result["sha256"]}:
+            progress.add(documents_unchanged=1)
+            return []
+        return [file_info] if success else []
+
+    # Per-document stage cache entries, keyed by the file's content hash, so a re-run skips extraction and
+    # chunking of every document it has already seen with the same settings
+    extraction_settings = get_extraction_settings()
+    chunking_settings = {**extraction_settings, **get_chunking_settings()}
+    # Documents with a failed page; their text is incomplete, so neither it nor its chunks are cached
+    incomplete_documents = set()
+
+    def extract(file_info: Dict) -> List[Dict]:
+        extraction_key = stage_cache_key("extraction", [[file_info["id"], file_info["name"], file_info["sha256"]]],
+                                         extraction_settings)
+        extraction = cached_stage("extraction", extraction_key, lambda: extract_text_from_files_list([file_info]),
+                                  to_record=extraction_to_dict,
+                                  should_cache=lambda results: all(extraction_succeeded(r) for r in results))
+        if not all(extraction_succeeded(r) for r in extraction):
+            incomplete_documents.add(file_info["id"])
+        if extraction and extraction[0].get("success"):
+            progress.add(documents_extracted=1, pages_extracted=extraction[0].get("page_count", 0),
+                         pages_ocr=extraction[0].get("ocr_pages_count", 0))
+        collect("extracted_texts", extraction)
+        # The per-page texts are dropped here; only the corpus item moves on
+        corpus = create_corpus_from_extraction(extraction)
+        collect("corpus", corpus)
+        return corpus
+
+    def chunk(corpus_item: Dict) -> List[tuple]:
+        chunks_key = stage_cache_key("document_chunks", [corpus_item["doc_id"], corpus_item["doc_hash"],
+                                                         corpus_item["pdf_name"], corpus_item["pdf_link"]],
+                                     chunking_settings)
+        chunks = cached_stage("document_chunks", chunks_key, lambda: create_chunks_from_corpus([corpus_item]),
+                              should_cache=lambda _: corpus_item["doc_id"] not in incomplete_documents)
+        progress.add(chunks_created=len(chunks))
+        stale_ids = []
+        if delta and corpus_item["doc_id"] in indexed_documents:
+            chunks, stale_ids = reconcile_document_chunks(corpus_item["doc_id"], chunks)
+        if not chunks:
+            # Nothing new to index for this document, so its stale chunks can go right away
+            progress.add(chunks_deleted=delete_chunks(stale_ids, target_index))
+            return []
+        return [(chunks, stale_ids)]
+
+    def reconcile_document_chunks(doc_id: str, chunks: List[Dict]) -> tuple:
+        # Chunk ids are content-based, so ids already in the index hold identical text and vectors
+        existing_ids = get_document_chunk_ids(doc_id, target_index)
+        new_ids = {chunk_doc["chunk_id"] for chunk_doc in chunks}
+        kept = [chunk_doc for chunk_doc in chunks if chunk_doc["chunk_id"] in existing_ids]
+        update_chunk_fields(kept, target_index)
+        progress.add(chunks_unchanged=len(kept))
+        new_chunks = [chunk_doc for chunk_doc in chunks if chunk_doc["chunk_id"] not in existing_ids]
+        return new_chunks, list(existing_ids - new_ids)
+
+    def embed(batch: tuple) -> List[tuple]:
+        chunks, stale_ids = batch
+        documents = create_elasticsearch_documents(add_dense_vectors(chunks))
+        progress.add(chunks_embedded=len(documents))
+        collect("chunks", documents)
+        return [(documents, stale_ids)]
+
+    buffer = []
+    stale_buffer = []
+    last_flush = [time.perf_counter()]
+
+    def flush_buffer():
+        last_flush[0] = time.perf_counter()
+        if not buffer:
+            return
+        if load_to_elasticsearch and not cancel_event.is_set():
+            result = index_chunks(list(buffer), target_index)
+            progress.add(chunks_indexed=result.get("indexed_count", 0))
+            with counters_lock:
+                counters["index_failed"] += result.get("failed_count", 0)
+                # Only chunks written to the live index are searchable before the run ends
+                if delta and result.get("indexed_count") and counters["first_indexed_seconds"] is None:
+                    counters["first_indexed_seconds"] = round(time.perf_counter() - start, 2)
+            if not result["success"]:
+                index_errors.append(result["message"])
+            elif stale_buffer:
+                # Old chunks of a changed document are replaced only once its new chunks are searchable
+                progress.add(chunks_deleted=delete_chunks(list(stale_buffer), target_index))
+        buffer.clear()
+        stale_buffer.clear()
+
+    def index(batch: tuple) -> List:
+        chunks, stale_ids = batch
+        buffer.extend(chunks)
+        stale_buffer.extend(stale_ids)
+        # Flush on size. A delta run writes to the live index, so it also flushes on age to make the first
+        # documents searchable quickly; a full build is not visible before publish, so small batches gain nothing
+        if len(buffer) >= bulk_batch_size or (delta and time.perf_counter() - last_flush[0] >= INGEST_FLUSH_SECONDS):
+            flush_buffer()
+        return []
+
+    stages = [
+        _Stage("download", download, download_queue, extract_queue, workers=INGEST_DOWNLOAD_WORKERS, cancel_event=cancel_event),
+        _Stage("extract", extract, extract_queue, chunk_queue, workers=INGEST_EXTRACT_WORKERS, cancel_event=cancel_event),
+        _Stage("chunk", chunk, chunk_queue, embed_queue, workers=INGEST_CHUNK_WORKERS, cancel_event=cancel_event),
+        _Stage("embed", embed, embed_queue, index_queue, cancel_event=cancel_event),
+        _Stage("index", index, index_queue, None, cancel_event=cancel_event)
+    ]
+
+    for file_info in files:
+        download_queue.put(file_info)
+    download_queue.put(_DONE)
+
+    progress.stage = "streaming"
+    for stage in stages:
+        stage.start()
+    for stage in stages:
+        stage.join()
+    flush_buffer()
+    flush_download_manifest()
+    cancelled = cancel_event.is_set()
+
+    removed_documents = []
+    if delta and not cancelled:
+        removed_documents = sorted(set(indexed_documents) - {file_info["id"] for file_info in files})
+        if removed_documents:
+            progress.add(chunks_deleted=delete_documents(removed_documents, target_index))
+
+    publish_result = None
+    if build_index and (cancelled or index_errors):
+        print(f"Discarding {build_index}, {index_name} keeps serving its current version")
+        delete_index(build_index)
+    elif build_index:
+        progress.stage = "publish"
+        publish_result = publish_index_version(build_index, index_name, expected_count=progress.get("chunks_indexed"))
+        if publish_result["success"]:
+            counters["first_indexed_seconds"] = round(time.perf_counter() - start, 2)
+    progress.stage = "cancelled" if cancelled else "done"
+
+    stage_stats = {stage.name: stage.stats.to_dict() for stage in stages}
+    downloaded_count = progress.get("files_downloaded")
+    chunks_count = progress.get("chunks_created")
+    indexed_count = progress.get("chunks_indexed")
+    elapsed = round(time.perf_counter() - start, 2)
+
+    if not load_to_elasticsearch:
+        elasticsearch_status = "Elasticsearch loading disabled"
+    elif index_errors:
+        elasticsearch_status = "; ".join(index_errors)
+    elif cancelled:
+        elasticsearch_status = "cancelled"
+    elif publish_result and not publish_result["success"]:
+        elasticsearch_status = publish_result["message"]
+    else:
+        elasticsearch_status = "success"
+
+    message = (f"Downloaded {downloaded_count} files, extracted text from {progress.get('documents_extracted')}, "
+               f"created corpus for {stage_stats['chunk']['items_in']} documents, generated {chunks_count} chunks")
+    if publish_result and publish_result["success"]:
+        message += f", indexed {indexed_count} chunks to Elasticsearch as {build_index}"
+    elif delta and not index_errors:
+        message += f", indexed {indexed_count} new chunks into {target_index}"
+    if delta:
+        message += (f" (delta: {progress.get('documents_unchanged')} unchanged files, {progress.get('chunks_unchanged')} "
+                    f"unchanged chunks, {progress.get('chunks_deleted')} chunks deleted, {len(removed_documents)} files removed)")
+    if cancelled:
+        message = f"Cancelled: {message}"
+
+    print(f"Streaming ingest completed in {elapsed}s: {message}")
+
+    return {
+        "success": downloaded_count > 0,
+        "cancelled": cancelled,
+        "message": message,
+        "files": files,
+        "documents_processed": downloaded_count,
+        "extracted_count": progress.get("documents_extracted"),
+        "corpus_count": stage_stats["chunk"]["items_in"],
+        "chunks_count": chunks_count,
+        "indexed_count": indexed_count,
+        "elasticsearch_status": elasticsearch_status,
+        "documents_removed": len(removed_documents),
+        "index_version": target_index if delta or (publish_result and publish_result["success"]) else None,
+        "first_indexed_seconds": counters["first_indexed_seconds"],
+        "elapsed_seconds": elapsed,
+        "stages": stage_stats,
+        "details": details
+    }
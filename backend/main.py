@@ -1,109 +1,90 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional
 import uvicorn
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
-from google_drive_utils import download_all_files_from_folder
-from pdf_utils import extract_text_from_files_list
-from corpus_utils import create_corpus_from_extraction, save_corpus_result, load_corpus_result
-from chunking_utils import create_chunks_from_corpus, add_dense_vectors, create_elasticsearch_documents, save_chunks_result, load_chunks_result
-from sentence_transformers import SentenceTransformer
-from elasticsearch_utils import get_elasticsearch_client, create_chunks_index, index_chunks, get_index_stats, search_bm25, search_dense_vector, search_elser, search_hybrid, search_hybrid_rrf
-from ollama_utils import generate_answer_from_chunks
-
-DEBUG = True
-AUTO_LOAD_TO_ELASTICSEARCH = True  
-DEBUG_DOWNLOAD_FILE = "cache/download_result.json"
-DEBUG_EXTRACTION_FILE = "cache/extraction_result.json"
-DEBUG_CORPUS_FILE = "cache/corpus_result.json"
-DEBUG_CHUNKS_FILE = "cache/chunks_result.json"
+from google_drive_utils import download_all_files_from_folder, close_drive_session, get_download_stats
+from pdf_utils import extract_text_from_files_list, extraction_to_dict, extraction_succeeded, get_extraction_settings, close_extraction_pool, get_extraction_stats, get_ocr_stats
+from corpus_utils import create_corpus_from_extraction
+from chunking_utils import create_chunks_from_corpus, add_dense_vectors, create_elasticsearch_documents, get_chunking_settings
+from elasticsearch_utils import init_elasticsearch_client, close_elasticsearch_client, get_elasticsearch_client, create_index_version, publish_index_version, delete_index, index_chunks, get_index_stats, search_bm25, search_dense_vector, search_hybrid
+from elasticsearch_utils import init_async_elasticsearch_client, close_async_elasticsearch_client, async_search_elser, async_search_hybrid_rrf
+from ollama_utils import generate_answer_from_chunks_async
+from ingest_pipeline import run_streaming_ingest, IngestProgress, get_index_meta
+from stage_cache_utils import cached_stage, get_stage_cache_stats, stage_cache_key
+from ingest_jobs import IngestJobManager, IngestJob, DETAIL_SECTIONS
+from embedding_utils import EmbeddingBatcher, EmbeddingCache, EMBEDDING_MODEL_NAME, get_embedding_model, warm_up_embedding_model, get_model_registry_stats, get_vector_cache_stats, close_vector_caches
 
-_embedding_model = None
+AUTO_LOAD_TO_ELASTICSEARCH = True  
+STREAMING_INGEST = True
+INGEST_MODES = ("delta", "full")
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))
 
-def get_embedding_model():
-    global _embedding_model
-    if _embedding_model is None:
-        print("Loading embedding model: sentence-transformers/all-MiniLM-L6-v2")
-        _embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-    return _embedding_model
+_embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS, thread_name_prefix="embedding")
+_query_embedding_cache = EmbeddingCache(EMBEDDING_MODEL_NAME)
 
 def generate_query_embedding(query: str) -> List[float]:
+    cached = _query_embedding_cache.get(query)
+    if cached is not None:
+        return cached
+    
     try:
         model = get_embedding_model()
-        embedding = model.encode(query)
-        return embedding.tolist()
+        embedding = model.encode(query).tolist()
+        _query_embedding_cache.put(query, embedding)
+        return embedding
     except Exception as e:
         print(f"Error generating embedding: {e}")
         return None
 
-def ensure_cache_directory():
-    cache_dir = "cache"
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir)
+def encode_queries(queries: List[str]) -> List[List[float]]:
+    model = get_embedding_model()
+    return model.encode(queries).tolist()
 
-def save_download_result(result: dict, url: str):
-    if not DEBUG:
-        return
-    
-    ensure_cache_directory()
-    debug_data = {
-        "timestamp": datetime.now().isoformat(),
-        "url": url,
-        "result": result
-    }
-    
-    try:
-        with open(DEBUG_DOWNLOAD_FILE, 'w', encoding='utf-8') as f:
-            json.dump(debug_data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        pass
+_embedding_batcher = EmbeddingBatcher(encode_queries, executor=_embedding_executor)
 
-def load_download_result() -> dict:
-    if not DEBUG or not os.path.exists(DEBUG_DOWNLOAD_FILE):
-        return None
+async def generate_query_embedding_async(query: str) -> List[float]:
+    cached = _query_embedding_cache.get(query)
+    if cached is not None:
+        return cached
     
     try:
-        with open(DEBUG_DOWNLOAD_FILE, 'r', encoding='utf-8') as f:
-            debug_data = json.load(f)
-            return debug_data.get("result")
+        embedding = await _embedding_batcher.embed(query)
+        _query_embedding_cache.put(query, embedding)
+        return embedding
     except Exception as e:
+        print(f"Error generating embedding: {e}")
         return None
 
-def save_extraction_result(extraction_results: list, url: str):
-    if not DEBUG:
-        return
-    
-    ensure_cache_directory()
-    debug_data = {
-        "timestamp": datetime.now().isoformat(),
-        "url": url,
-        "extraction_results": extraction_results
-    }
-    
-    try:
-        with open(DEBUG_EXTRACTION_FILE, 'w', encoding='utf-8') as f:
-            json.dump(debug_data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        pass
-
-def load_extraction_result() -> list:
-    if not DEBUG or not os.path.exists(DEBUG_EXTRACTION_FILE):
-        return None
-    
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_elasticsearch_client()
+    init_async_elasticsearch_client()
     try:
-        with open(DEBUG_EXTRACTION_FILE, 'r', encoding='utf-8') as f:
-            debug_data = json.load(f)
-            return debug_data.get("extraction_results")
+        warm_up_embedding_model()
     except Exception as e:
-        return None
+        print(f"Embedding model warm-up failed: {e}")
+    _embedding_batcher.start()
+    yield
+    await _embedding_batcher.stop()
+    _ingest_jobs.shutdown()
+    close_extraction_pool()
+    close_vector_caches()
+    close_drive_session()
+    await close_async_elasticsearch_client()
+    close_elasticsearch_client()
 
-app = FastAPI(title="RAG Pipeline API", description="A RAG injection pipeline from Google Drive", version="1.0.0")
+app = FastAPI(title="RAG Pipeline API", description="A RAG injection pipeline from Google Drive", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -118,6 +99,8 @@ class QueryRequest(BaseModel):
     type: Optional[str] = "hybrid"
     size: Optional[int] = 5
     k: Optional[int] = 60
+    hybrid_mode: Optional[str] = "concurrent"
+    fusion_engine: Optional[str] = "client"
     use_llm: Optional[bool] = True
     
 class QueryResponse(BaseModel):
@@ -129,62 +112,32 @@ class QueryResponse(BaseModel):
     
 class IngestRequest(BaseModel):
     google_drive_url: str
-    
-class FileInfo(BaseModel):
-    id: str
-    name: str
-    download_link: str
-    local_path: str
-
-class PageInfo(BaseModel):
-    page: int
-    text: str
-    char_count: int
-    ocr_used: Optional[bool] = False
-    original_char_count: Optional[int] = None
-    ocr_error: Optional[str] = None
-
-class ExtractedFileInfo(BaseModel):
-    file_id: str
-    filename: str
-    filepath: str
-    download_link: str
-    success: bool
-    text: str
-    page_count: int
-    char_count: int
-    word_count: int
-    pages: List[PageInfo]
-    metadata: dict
-    ocr_pages_count: Optional[int] = 0
-    error: Optional[str]
-
-class CorpusItem(BaseModel):
-    pdf_name: str
-    pdf_link: str
-    corpus: str
-
-class ChunkDocument(BaseModel):
-    chunk_id: str
-    filename: str
-    drive_url: str
-    raw_text: str
-    dense_vector: List[float]
-    text_for_elser: str
-    metadata: Dict
+    keep_details: Optional[bool] = False
+    mode: Optional[str] = "delta"
 
 class IngestResponse(BaseModel):
     status: str
     message: str
     documents_processed: int
-    files: List[FileInfo]
-    extracted_texts: List[ExtractedFileInfo]
-    corpus: List[CorpusItem]
-    chunks: List[ChunkDocument]
+    files_count: int
+    extracted_count: int
+    pages_count: int
+    ocr_pages_count: int
+    corpus_count: int
     chunks_count: int
+    documents_unchanged: int = 0
+    documents_removed: int = 0
+    chunks_unchanged: int = 0
+    chunks_deleted: int = 0
     elasticsearch_indexed: int
     elasticsearch_status: str
 
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    message: str
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
@@ -195,30 +148,34 @@ async def query(request: QueryRequest):
     
     try:
         if request.type == "hybrid":
-            query_vector = generate_query_embedding(request.question)
+            query_vector = await generate_query_embedding_async(request.question)
             if not query_vector:
                 print("Warning: Failed to generate query embedding, proceeding without dense vector")
             
-            result = search_hybrid_rrf(
+            result = await async_search_hybrid_rrf(
                 query=request.question,
                 query_vector=query_vector,
                 size=request.size,
-                k=request.k
+                k=request.k,
+                mode=request.hybrid_mode,
+                engine=request.fusion_engine
             )
             
             print(f"\n HYBRID RRF SEARCH RESULTS ({len(result['results'])} found):")
             if result["success"] and result["results"]:
                 for i, hit in enumerate(result["results"], 1):
-                    rrf_score = hit.get('rrf_score', 0)
-                    found_in = hit.get('found_in', {})
-                    methods = [k for k, v in found_in.items() if v]
-                    print(f"{i}. [{hit['filename']}] RRF Score: {rrf_score:.4f}")
-                    print(f"   Found in: {', '.join(methods)}")
+                    if 'rrf_score' in hit:
+                        found_in = hit.get('found_in', {})
+                        methods = [k for k, v in found_in.items() if v]
+                        print(f"{i}. [{hit['filename']}] RRF Score: {hit['rrf_score']:.4f}")
+                        print(f"   Found in: {', '.join(methods)}")
+                    else:
+                        print(f"{i}. [{hit['filename']}] RRF Rank: {hit.get('rrf_rank')}")
                     print(f"   Text: {hit['raw_text'][:150]}...")
                     print()
                         
         elif request.type == "elser":
-            result = search_elser(
+            result = await async_search_elser(
                 query=request.question,
                 size=request.size,
                 min_score=0.0
@@ -246,7 +203,7 @@ async def query(request: QueryRequest):
         if request.use_llm and result["results"]:
             print(f"\n🤖 GENERATING LLM ANSWER using {len(result['results'])} retrieved chunks...")
             
-            llm_result = generate_answer_from_chunks(
+            llm_result = await generate_answer_from_chunks_async(
                 query=request.question,
                 chunks=result["results"],
                 max_chunks=min(request.size, 5),
@@ -304,99 +261,158 @@ async def query(request: QueryRequest):
 
 
 
-@app.post("/ingest", response_model=IngestResponse)
-async def ingest(request: IngestRequest):
-    print(f"Starting ingest process for URL: {request.google_drive_url}")
-    print(f"DEBUG mode: {DEBUG}, AUTO_LOAD_TO_ELASTICSEARCH: {AUTO_LOAD_TO_ELASTICSEARCH}")
-    if DEBUG:
-        print("Checking for cached download result...")
-        cached_download = load_download_result()
-        if cached_download:
-            print("Using cached download result")
-            result = cached_download
+def _ingest_summary(status: str, message: str, documents_processed: int, files: list, progress: IngestProgress,
+                    corpus_count: int = 0, elasticsearch_indexed: int = 0, elasticsearch_status: str = "not attempted",
+                    documents_removed: int = 0) -> IngestResponse:
+    return IngestResponse(
+        status=status,
+        message=message,
+        documents_processed=documents_processed,
+        files_count=len(files),
+        extracted_count=progress.get("documents_extracted"),
+        pages_count=progress.get("pages_extracted"),
+        ocr_pages_count=progress.get("pages_ocr"),
+        corpus_count=corpus_count,
+        chunks_count=progress.get("chunks_created"),
+        documents_unchanged=progress.get("documents_unchanged"),
+        documents_removed=documents_removed,
+        chunks_unchanged=progress.get("chunks_unchanged"),
+        chunks_deleted=progress.get("chunks_deleted"),
+        elasticsearch_indexed=elasticsearch_indexed,
+        elasticsearch_status=elasticsearch_status
+    )
+
+def _ingest_details(files: list, extracted_texts: list = None, corpus: list = None, chunks: list = None, keep_details: bool = False) -> dict:
+    # The file list is small and always kept; texts, corpus and chunks (with vectors) only on request
+    details = {"files": files}
+    if keep_details:
+        details.update(extracted_texts=extracted_texts or [], corpus=corpus or [], chunks=chunks or [])
+    return details
+
+def _cancelled_ingest_response(documents_processed: int, files: list, progress: IngestProgress) -> IngestResponse:
+    print("Ingest cancelled")
+    return _ingest_summary("cancelled", "Ingest cancelled before completion", documents_processed, files, progress)
+
+def run_ingest(google_drive_url: str, progress: Optional[IngestProgress] = None, cancel_event: Optional[threading.Event] = None,
+               keep_details: bool = False, mode: str = "delta") -> tuple:
+    """
+    Run an ingest and return (summary, details). The summary is a compact IngestResponse; details maps
+    DETAIL_SECTIONS names to lists and holds extracted texts, corpus and chunks only when keep_details is set.
+    mode "delta" updates the existing index with only what changed; "full" rebuilds it from scratch.
+    Delta ingest runs on the streaming pipeline; the batch path always rebuilds.
+    """
+    progress = progress or IngestProgress()
+    cancel_event = cancel_event or threading.Event()
+    print(f"Starting ingest process for URL: {google_drive_url}")
+    print(f"AUTO_LOAD_TO_ELASTICSEARCH: {AUTO_LOAD_TO_ELASTICSEARCH}, STREAMING_INGEST: {STREAMING_INGEST}, mode: {mode}")
+    
+    if STREAMING_INGEST:
+        streaming_result = run_streaming_ingest(
+            google_drive_url,
+            "hexaware_chunks",
+            load_to_elasticsearch=AUTO_LOAD_TO_ELASTICSEARCH,
+            progress=progress,
+            cancel_event=cancel_event,
+            collect_details=keep_details,
+            delta=mode == "delta"
+        )
+        
+        if streaming_result["cancelled"]:
+            response_status = "cancelled"
         else:
-            print("No cached download found, downloading from Google Drive...")
-            result = download_all_files_from_folder(request.google_drive_url)
-            save_download_result(result, request.google_drive_url)
-    else:
-        print("Downloading from Google Drive (DEBUG=False)...")
-        result = download_all_files_from_folder(request.google_drive_url)
+            # A delta run where every file is unchanged extracts nothing and is still a success
+            documents_current = streaming_result["extracted_count"] + progress.get("documents_unchanged")
+            response_status = "success" if streaming_result["success"] and documents_current else "partial" if streaming_result["success"] else "error"
+        summary = _ingest_summary(
+            response_status,
+            streaming_result["message"],
+            streaming_result["documents_processed"],
+            streaming_result["files"],
+            progress,
+            corpus_count=streaming_result["corpus_count"],
+            elasticsearch_indexed=streaming_result["indexed_count"],
+            elasticsearch_status=streaming_result["elasticsearch_status"],
+            documents_removed=streaming_result.get("documents_removed", 0)
+        )
+        return summary, _ingest_details(streaming_result["files"], keep_details=keep_details, **(streaming_result["details"] or {}))
+    
+    if mode == "delta":
+        print("Delta ingest requires STREAMING_INGEST, running a full rebuild instead")
+    progress.stage = "download"
+    # Always re-listed and downloaded: the download manifest skips unchanged files, and the content hashes
+    # it returns key the cached stages below
+    print("Downloading from Google Drive...")
+    result = download_all_files_from_folder(google_drive_url)
     
     if not result["success"] or not result.get("files"):
         print(f"Download failed: {result['message']}")
-        return IngestResponse(
-            status="error",
-            message=result["message"],
-            documents_processed=result["count"],
-            files=result.get("files", []),
-            extracted_texts=[],
-            corpus=[],
-            chunks=[],
-            chunks_count=0,
-            elasticsearch_indexed=0,
-            elasticsearch_status="not attempted"
-        )
+        files = result.get("files", [])
+        return _ingest_summary("error", result["message"], result["count"], files, progress), _ingest_details(files)
+    
+    files = result["files"]
+    progress.set(files_total=len(files), files_downloaded=result["count"], files_failed=len(files) - result["count"])
+    if cancel_event.is_set():
+        return _cancelled_ingest_response(result["count"], files, progress), _ingest_details(files)
     
     print(f"Processing {result['count']} downloaded files...")
-    if DEBUG:
-        print("Checking for cached extraction result...")
-        cached_extraction = load_extraction_result()
-        if cached_extraction:
-            print("Using cached extraction result")
-            extraction_results = cached_extraction
-        else:
-            print("No cached extraction found, extracting text...")
-            extraction_results = extract_text_from_files_list(result["files"])
-            save_extraction_result(extraction_results, request.google_drive_url)
-    else:
-        print("Extracting text from files (DEBUG=False)...")
-        extraction_results = extract_text_from_files_list(result["files"])
+    progress.stage = "extract"
+    extraction_key = stage_cache_key("extraction", [[f.get("id"), f.get("name"), f.get("sha256")] for f in files],
+                                     get_extraction_settings())
+    extraction_results = cached_stage("extraction", extraction_key, lambda: extract_text_from_files_list(files),
+                                       to_record=extraction_to_dict,
+                                       should_cache=lambda results: all(extraction_succeeded(r) for r in results))
+    # Later stages share the extraction key, so a failed extraction must not leave them cached either
+    extraction_complete = all(extraction_succeeded(r) for r in extraction_results)
     
-    if DEBUG:
-        print("Checking for cached corpus result...")
-        cached_corpus = load_corpus_result(DEBUG_CORPUS_FILE)
-        if cached_corpus:
-            print(f"Using cached corpus with {len(cached_corpus)} documents")
-            corpus = cached_corpus
-        else:
-            print("No cached corpus found, creating corpus...")
-            corpus = create_corpus_from_extraction(extraction_results)
-            save_corpus_result(corpus, request.google_drive_url, DEBUG_CORPUS_FILE)
-    else:
-        print("Creating corpus (DEBUG=False)...")
-        corpus = create_corpus_from_extraction(extraction_results)
+    successful_extractions = [r for r in extraction_results if r["success"]]
+    progress.set(
+        documents_extracted=len(successful_extractions),
+        pages_extracted=sum(r.get("page_count", 0) for r in successful_extractions),
+        pages_ocr=sum(r.get("ocr_pages_count", 0) for r in successful_extractions)
+    )
+    if cancel_event.is_set():
+        return _cancelled_ingest_response(result["count"], files, progress), _ingest_details(files, extraction_results, keep_details=keep_details)
     
-    if DEBUG:
-        print("Checking for cached chunks result...")
-        cached_chunks = load_chunks_result(DEBUG_CHUNKS_FILE)
-        if cached_chunks:
-            print(f"Using cached chunks: {len(cached_chunks)} chunks loaded")
-            chunks = cached_chunks
-        else:
-            print("No cached chunks found, creating chunks...")
-            chunks = create_chunks_from_corpus(corpus)
-            print(f"Created {len(chunks)} text chunks")
-            print("Adding dense vectors to chunks...")
-            chunks = add_dense_vectors(chunks)
-            print("Creating Elasticsearch documents...")
-            chunks = create_elasticsearch_documents(chunks)
-            save_chunks_result(chunks, request.google_drive_url, DEBUG_CHUNKS_FILE)
-    else:
-        print("Creating chunks (DEBUG=False)...")
+    progress.stage = "chunk"
+    corpus_key = stage_cache_key("corpus", extraction_key)
+    corpus = cached_stage("corpus", corpus_key, lambda: create_corpus_from_extraction(extraction_results),
+                          should_cache=lambda _: extraction_complete)
+    
+    def build_chunks() -> list:
         chunks = create_chunks_from_corpus(corpus)
         print(f"Created {len(chunks)} text chunks")
         print("Adding dense vectors to chunks...")
         chunks = add_dense_vectors(chunks)
         print("Creating Elasticsearch documents...")
-        chunks = create_elasticsearch_documents(chunks)
+        return create_elasticsearch_documents(chunks)
+    
+    chunks_key = stage_cache_key("chunks", corpus_key, get_chunking_settings())
+    chunks = cached_stage("chunks", chunks_key, build_chunks, vector_field="dense_vector",
+                          should_cache=lambda _: extraction_complete)
     
+    progress.set(chunks_created=len(chunks), chunks_embedded=len(chunks))
+    if cancel_event.is_set():
+        return (_cancelled_ingest_response(result["count"], files, progress),
+                _ingest_details(files, extraction_results, corpus, chunks, keep_details))
+    
+    progress.stage = "index"
     elasticsearch_result = {"success": False, "message": "Elasticsearch loading disabled", "indexed_count": 0}
     
     if AUTO_LOAD_TO_ELASTICSEARCH and chunks:
         print(f"Starting Elasticsearch indexing for {len(chunks)} chunks...")
         try:
-            create_chunks_index("hexaware_chunks")
-            elasticsearch_result = index_chunks(chunks, "hexaware_chunks")
+            build_index = create_index_version("hexaware_chunks", meta=get_index_meta())
+            if not build_index:
+                raise RuntimeError("could not create a new index version")
+            elasticsearch_result = index_chunks(chunks, build_index)
+            if elasticsearch_result["success"]:
+                publish_result = publish_index_version(build_index, "hexaware_chunks",
+                                                       expected_count=elasticsearch_result["indexed_count"])
+                if not publish_result["success"]:
+                    elasticsearch_result = {"success": False, "message": publish_result["message"], "indexed_count": 0}
+            else:
+                delete_index(build_index)
+            progress.set(chunks_indexed=elasticsearch_result["indexed_count"])
             print(f"Elasticsearch indexing completed: {elasticsearch_result['message']}")
         except Exception as e:
             print(f"Elasticsearch indexing failed: {str(e)}")
@@ -406,7 +422,7 @@ async def ingest(request: IngestRequest):
     elif not chunks:
         print("Elasticsearch indexing skipped (no chunks available)")
     
-    successful_extractions = [r for r in extraction_results if r["success"]]
+    progress.stage = "done"
     es_message = f", indexed {elasticsearch_result['indexed_count']} chunks to Elasticsearch" if elasticsearch_result["success"] else ""
     extraction_message = f"Downloaded {result['count']} files, extracted text from {len(successful_extractions)}, created corpus for {len(corpus)} documents, generated {len(chunks)} chunks{es_message}"
     
@@ -415,18 +431,95 @@ async def ingest(request: IngestRequest):
     response_status = "success" if result["success"] and successful_extractions else "partial" if result["success"] else "error"
     print(f"Returning response with status: {response_status}")
     
-    return IngestResponse(
-        status=response_status,
-        message=extraction_message,
-        documents_processed=result["count"],
-        files=result.get("files", []),
-        extracted_texts=extraction_results,
-        corpus=corpus,
-        chunks=chunks,
-        chunks_count=len(chunks),
+    summary = _ingest_summary(
+        response_status,
+        extraction_message,
+        result["count"],
+        files,
+        progress,
+        corpus_count=len(corpus),
         elasticsearch_indexed=elasticsearch_result["indexed_count"],
         elasticsearch_status="success" if elasticsearch_result["success"] else elasticsearch_result["message"]
     )
+    return summary, _ingest_details(files, extraction_results, corpus, chunks, keep_details)
+
+
+
+def _run_ingest_job(job: IngestJob) -> dict:
+    summary, job.details = run_ingest(job.google_drive_url, job.progress, job.cancel_event, job.keep_details, job.mode)
+    return summary.model_dump()
+
+def _detail_item(section: str, item: dict, include_vectors: bool, include_text: bool) -> dict:
+    if section == "chunks" and not include_vectors:
+        return {key: value for key, value in item.items() if key != "dense_vector"}
+    if section == "chunks" and hasattr(item.get("dense_vector"), "tolist"):
+        # Chunks loaded from the stage cache carry memory-mapped vectors
+        return {**item, "dense_vector": item["dense_vector"].tolist()}
+    if section == "extracted_texts":
+        if not include_text:
+            return {key: value for key, value in item.items() if key not in ("text", "pages")}
+        return extraction_to_dict(item)
+    if section == "corpus" and not include_text:
+        return {key: value for key, value in item.items() if key != "corpus"}
+    return item
+
+def _get_job_or_404(job_id: str) -> IngestJob:
+    job = _ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job not found: {job_id}")
+    return job
+
+_ingest_jobs = IngestJobManager(_run_ingest_job)
+
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
+async def ingest(request: IngestRequest):
+    if request.mode not in INGEST_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode '{request.mode}', expected one of {', '.join(INGEST_MODES)}")
+    job = _ingest_jobs.submit(request.google_drive_url, request.keep_details, request.mode)
+    return IngestJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        status_url=f"/ingest/{job.job_id}",
+        message=f"Ingest job queued for {request.google_drive_url}"
+    )
+
+@app.get("/ingest/{job_id}")
+async def ingest_status(job_id: str):
+    return _get_job_or_404(job_id).to_dict()
+
+@app.get("/ingest/{job_id}/{section}")
+async def ingest_details(job_id: str, section: str, offset: int = 0, limit: int = 50, format: str = "json",
+                         include_vectors: bool = False, include_text: bool = False):
+    job = _get_job_or_404(job_id)
+    if section not in DETAIL_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section '{section}', expected one of {', '.join(DETAIL_SECTIONS)}")
+    if section not in job.details:
+        message = "job has not finished" if not job.finished else "start the job with keep_details=true to keep it"
+        raise HTTPException(status_code=404, detail=f"No {section} available for job {job_id}: {message}")
+    
+    items = job.details[section]
+    if format == "ndjson":
+        def stream_items():
+            for item in items[offset:]:
+                yield json.dumps(_detail_item(section, item, include_vectors, include_text), default=str) + "\n"
+        return StreamingResponse(stream_items(), media_type="application/x-ndjson")
+    
+    limit = max(1, min(limit, 1000))
+    return {
+        "job_id": job_id,
+        "section": section,
+        "offset": offset,
+        "limit": limit,
+        "total": len(items),
+        "items": [_detail_item(section, item, include_vectors, include_text) for item in items[offset:offset + limit]]
+    }
+
+@app.post("/ingest/{job_id}/cancel")
+async def cancel_ingest(job_id: str):
+    job = _ingest_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job not found: {job_id}")
+    return job.to_dict(include_result=False)
 
 
 
@@ -482,6 +575,20 @@ async def health_check():
     
     return health_status
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "timestamp": datetime.now(),
+        "embedding_models": get_model_registry_stats(),
+        "embedding_batcher": _embedding_batcher.get_stats(),
+        "query_embedding_cache": _query_embedding_cache.get_stats(),
+        "chunk_embedding_cache": get_vector_cache_stats(),
+        "stage_cache": get_stage_cache_stats(),
+        "pdf_extraction": get_extraction_stats(),
+        "ocr": get_ocr_stats(),
+        "drive_downloads": get_download_stats()
+    }
+
 @app.get("/")
 async def root():
     return {
@@ -489,8 +596,12 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /query": "Submit a question and get an answer with citations",
-            "POST /ingest": "Download documents, extract text, create chunks, and index to Elasticsearch",
-            "GET /healthz": "Health check"
+            "POST /ingest": "Start a background job that downloads documents, extracts text, creates chunks, and indexes to Elasticsearch",
+            "GET /ingest/{job_id}": "Ingest job status, per-stage progress and throughput",
+            "GET /ingest/{job_id}/{section}": "Paginated (or NDJSON) files, extracted_texts, corpus or chunks of a finished job",
+            "POST /ingest/{job_id}/cancel": "Cancel a queued or running ingest job",
+            "GET /healthz": "Health check",
+            "GET /metrics": "Runtime metrics (embedding batching and query embedding cache)"
         }
     }
 
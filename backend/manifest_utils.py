@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+DRIVE_MANIFEST_PATH = os.getenv("DRIVE_MANIFEST_PATH", "cache/download_manifest.json")
+MANIFEST_SAVE_INTERVAL = 2.0
+
+
+class DownloadManifest:
+    """
+    Persistent record of every downloaded Drive file: id, name, size, SHA-256, HTTP validators
+    (ETag/Last-Modified) and last fetch time, plus an index from content hash to local path.
+    Saved atomically as JSON, at most every MANIFEST_SAVE_INTERVAL seconds and on flush().
+    """
+
+    def __init__(self, path: str = DRIVE_MANIFEST_PATH):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f).get("files", {})
+                print(f"Loaded download manifest with {len(self._entries)} files from {path}")
+            except Exception as e:
+                print(f"Could not read download manifest {path}, starting empty: {e}")
+
+    def get(self, file_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(file_id)
+            return dict(entry) if entry else None
+
+    def find_by_hash(self, sha256: str, exclude_path: str = "") -> Optional[str]:
+        """Return the local path of another file with this content that still exists on disk."""
+        with self._lock:
+            candidates = [entry["local_path"] for entry in self._entries.values()
+                          if entry.get("sha256") == sha256 and entry.get("local_path") != exclude_path]
+        for local_path in candidates:
+            if os.path.exists(local_path):
+                return local_path
+        return None
+
+    def record(self, file_id: str, name: str, local_path: str, size: int, sha256: str,
+               etag: Optional[str] = None, last_modified: Optional[str] = None):
+        with self._lock:
+            self._entries[file_id] = {
+                "name": name,
+                "local_path": local_path,
+                "size": size,
+                "sha256": sha256,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": datetime.now().isoformat()
+            }
+            self._dirty = True
+        self._maybe_save()
+
+    def _maybe_save(self):
+        if time.monotonic() - self._last_save >= MANIFEST_SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {"updated_at": datetime.now().isoformat(), "files": dict(self._entries)}
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+            manifest_dir = os.path.dirname(self.path)
+            if manifest_dir and not os.path.exists(manifest_dir):
+                os.makedirs(manifest_dir)
+
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                self._dirty = True
+                print(f"Could not save download manifest {self.path}: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
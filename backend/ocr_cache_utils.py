@@ -0,0 +1,112 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Optional
+
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", "cache/ocr_cache.sqlite")
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", "512"))
+
+
+def ocr_cache_key(samples: bytes, width: int, height: int, stride: int, n: int, settings: str) -> str:
+    """
+    Key a rendered page by its pixels, geometry and the OCR settings that produced its text, so identical
+    pages in different documents share one entry and changing engine or language never returns stale text.
+    """
+    digest = hashlib.sha256(samples)
+    digest.update(f"{width}x{height}x{n}:{stride}:{settings}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """
+    Size-bounded on-disk cache of OCR text in a SQLite file. Least recently used entries are evicted
+    once the stored text exceeds max_mb.
+    """
+
+    def __init__(self, path: str = OCR_CACHE_PATH, max_mb: float = OCR_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        # Callbacks from the OCR pool store results from its management thread
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS ocr_pages (key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+                           "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_pages_last_used ON ocr_pages (last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_pages").fetchone()[0]
+
+        print(f"Opened OCR cache at {path} ({round(self._size / 1024 / 1024, 2)} MB of {max_mb} MB)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM ocr_pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+
+            self._conn.execute("UPDATE ocr_pages SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM ocr_pages WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO ocr_pages (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+                               (key, text, size, time.time()))
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Trim to 90% so eviction doesn't run on every insert once the cache is full
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM ocr_pages ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            self._conn.execute("DELETE FROM ocr_pages WHERE key = ?", (key,))
+            self._size -= size
+            self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_pages")
+            self._conn.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ocr_pages").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "size_mb": round(self._size / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions
+            }
@@ -1,42 +1,33 @@
 import ollama
 from typing import List, Dict, Optional
+import asyncio
 import json
 import time
 from prompts import get_answer_prompt
 
+GENERATION_OPTIONS = {
+    'temperature': 0.3,
+    'top_p': 0.9,
+    'max_tokens': 512
+}
+
 class OllamaClient:
     def __init__(self, model_name: str = "gemma3:4b", host: str = "http://localhost:11434"):
         self.model_name = model_name
         self.host = host
         self.client = ollama.Client(host=host)
+        self.async_client = ollama.AsyncClient(host=host)
         
         print(f"Initialized Ollama client for model: {model_name} at {host}")
 
     def _make_request(self, prompt: str, max_retries: int = 3) -> dict:
         for attempt in range(max_retries):
             try:
-                response = self.client.generate(
-                    model=self.model_name,
-                    prompt=prompt,
-                    options={
-                        'temperature': 0.3,
-                        'top_p': 0.9,
-                        'max_tokens': 512
-                    }
-                )
-                
-                if response and 'response' in response:
-                    return {"success": True, "data": response}
-                else:
-                    return {"success": False, "error": "Invalid response format"}
+                response = self.client.generate(model=self.model_name, prompt=prompt, options=GENERATION_OPTIONS)
+                return self._check_response(response)
                     
             except ollama.ResponseError as e:
-                error_msg = str(e)
-                if "model not found" in error_msg.lower():
-                    return {"success": False, "error": f"Model '{self.model_name}' not found. Please pull it first with: ollama pull {self.model_name}"}
-                else:
-                    print(f"Ollama API error: {error_msg}")
-                    return {"success": False, "error": error_msg}
+                return self._response_error(e)
                     
             except Exception as e:
                 print(f"Request failed: {str(e)}")
@@ -48,22 +39,67 @@ class OllamaClient:
         
         return {"success": False, "error": "Max retries exceeded"}
 
+    async def _make_request_async(self, prompt: str, max_retries: int = 3) -> dict:
+        for attempt in range(max_retries):
+            try:
+                response = await self.async_client.generate(model=self.model_name, prompt=prompt, options=GENERATION_OPTIONS)
+                return self._check_response(response)
+                    
+            except ollama.ResponseError as e:
+                return self._response_error(e)
+                    
+            except Exception as e:
+                print(f"Request failed: {str(e)}")
+                if attempt < max_retries - 1:
+                    print(f"Retrying... ({attempt + 1}/{max_retries})")
+                    await asyncio.sleep(1)
+                    continue
+                return {"success": False, "error": str(e)}
+        
+        return {"success": False, "error": "Max retries exceeded"}
+
+    def _check_response(self, response) -> dict:
+        if response and 'response' in response:
+            return {"success": True, "data": response}
+        return {"success": False, "error": "Invalid response format"}
+
+    def _response_error(self, error: Exception) -> dict:
+        error_msg = str(error)
+        if "model not found" in error_msg.lower():
+            return {"success": False, "error": f"Model '{self.model_name}' not found. Please pull it first with: ollama pull {self.model_name}"}
+        print(f"Ollama API error: {error_msg}")
+        return {"success": False, "error": error_msg}
+
     def generate_answer(self, query: str, context_chunks: List[str], max_length: int = 512) -> dict:
         print(f"Generating answer for query: '{query}' using {len(context_chunks)} context chunks")
         
         if not context_chunks:
-            return {
-                "success": False, 
-                "error": "No context chunks provided",
-                "answer": "I don't have enough information to answer your question."
-            }
-        
-        context = "\n\n".join([f"Document {i+1}: {chunk}" for i, chunk in enumerate(context_chunks[:5])])
+            return self._no_context_result()
         
-        prompt = get_answer_prompt(context, query)
+        result = self._make_request(self._build_prompt(query, context_chunks))
+        return self._build_answer(result, context_chunks)
 
-        result = self._make_request(prompt)
+    async def generate_answer_async(self, query: str, context_chunks: List[str], max_length: int = 512) -> dict:
+        print(f"Generating answer (async) for query: '{query}' using {len(context_chunks)} context chunks")
+        
+        if not context_chunks:
+            return self._no_context_result()
         
+        result = await self._make_request_async(self._build_prompt(query, context_chunks))
+        return self._build_answer(result, context_chunks)
+
+    def _no_context_result(self) -> dict:
+        return {
+            "success": False, 
+            "error": "No context chunks provided",
+            "answer": "I don't have enough information to answer your question."
+        }
+
+    def _build_prompt(self, query: str, context_chunks: List[str]) -> str:
+        context = "\n\n".join([f"Document {i+1}: {chunk}" for i, chunk in enumerate(context_chunks[:5])])
+        return get_answer_prompt(context, query)
+
+    def _build_answer(self, result: dict, context_chunks: List[str]) -> dict:
         if result["success"]:
             try:
                 response_data = result["data"]
@@ -146,18 +182,15 @@ class OllamaClient:
             return {"success": False, "error": str(e), "models": []}
 
 
+_ollama_clients = {}
+
 def get_ollama_client(model_name: str = "gemma3:4b") -> OllamaClient:
-    return OllamaClient(model_name=model_name)
+    if model_name not in _ollama_clients:
+        _ollama_clients[model_name] = OllamaClient(model_name=model_name)
+    return _ollama_clients[model_name]
 
 
-def generate_answer_from_chunks(query: str, chunks: List[Dict], max_chunks: int = 5, model_name: str = "gemma3:4b") -> dict:
-    if not chunks:
-        return {
-            "success": False,
-            "answer": "No relevant documents found for your question.",
-            "sources_used": 0
-        }
-    
+def _collect_context(chunks: List[Dict], max_chunks: int) -> tuple[List[str], List[str]]:
     context_chunks = []
     sources = []
     
@@ -169,6 +202,19 @@ def generate_answer_from_chunks(query: str, chunks: List[Dict], max_chunks: int
             context_chunks.append(text)
             sources.append(filename)
     
+    return context_chunks, sources
+
+
+def generate_answer_from_chunks(query: str, chunks: List[Dict], max_chunks: int = 5, model_name: str = "gemma3:4b") -> dict:
+    if not chunks:
+        return {
+            "success": False,
+            "answer": "No relevant documents found for your question.",
+            "sources_used": 0
+        }
+    
+    context_chunks, sources = _collect_context(chunks, max_chunks)
+    
     if not context_chunks:
         return {
             "success": False,
@@ -183,4 +229,31 @@ def generate_answer_from_chunks(query: str, chunks: List[Dict], max_chunks: int
         result["sources_used"] = len(set(sources))  # Unique source count
         result["source_files"] = list(set(sources))
     
-    return result
\ No newline at end of file
+    return result
+
+
+async def generate_answer_from_chunks_async(query: str, chunks: List[Dict], max_chunks: int = 5, model_name: str = "gemma3:4b") -> dict:
+    if not chunks:
+        return {
+            "success": False,
+            "answer": "No relevant documents found for your question.",
+            "sources_used": 0
+        }
+    
+    context_chunks, sources = _collect_context(chunks, max_chunks)
+    
+    if not context_chunks:
+        return {
+            "success": False,
+            "answer": "The retrieved documents don't contain readable text.",
+            "sources_used": 0
+        }
+    
+    client = get_ollama_client(model_name)
+    result = await client.generate_answer_async(query, context_chunks)
+    
+    if result["success"]:
+        result["sources_used"] = len(set(sources))  # Unique source count
+        result["source_files"] = list(set(sources))
+    
+    return result
@@ -1,9 +1,41 @@
 import os
-import io
+import time
+import threading
+import re
+import multiprocessing
 import fitz
 import pytesseract
 from PIL import Image
-from typing import List, Dict, Optional
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Callable, Optional
+from ocr_cache_utils import OcrCache, ocr_cache_key, OCR_CACHE_ENABLED
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_MAX_PENDING = int(os.getenv("OCR_MAX_PENDING", str(OCR_WORKERS * 4)))
+OCR_ENGINE = os.getenv("OCR_ENGINE", "tesserocr")  # "tesserocr" (in-process) or "pytesseract" (subprocess per page)
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+OCR_MIN_TEXT_CHARS = 50
+
+_extraction_pool = None
+_ocr_pool = None
+_extraction_pool_lock = threading.Lock()
+_worker_stats = {}
+_worker_stats_lock = threading.Lock()
+# Bounds how many rendered pages wait for OCR at once, so scanned folders don't pile up pixmaps in memory
+_ocr_slots = threading.BoundedSemaphore(OCR_MAX_PENDING)
+_ocr_stats = {"pages": 0, "errors": 0, "busy_seconds": 0.0, "first_submitted_at": None, "last_completed_at": None}
+_ocr_stats_lock = threading.Lock()
+_tesseract_engines = threading.local()
+_ocr_cache = None
 
 
 def extract_text_from_pdf(pdf_path: str) -> str:
@@ -24,59 +56,254 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         return ""
 
 
-def extract_text_with_ocr_fallback(page, page_num: int) -> Dict[str, any]:
-    try:
+class PageText:
+    """
+    One extracted page. Until its document is assembled the page owns its text; afterwards it only keeps
+    offsets into the document's text buffer, so each page's text is held in memory once.
+    """
 
-        page_text = page.get_text()
-        
+    __slots__ = ("page", "char_count", "ocr_used", "original_char_count", "ocr_error", "error",
+                 "_text", "_raw_text", "_document", "_start", "_end")
+
+    def __init__(self, page: int, text: str, char_count: int, error: Optional[str] = None):
+        self.page = page
+        self.char_count = char_count
+        self.ocr_used = False
+        self.original_char_count = None
+        self.ocr_error = None
+        self.error = error
+        self._text = text
+        self._raw_text = None
+        self._document = None
+        self._start = 0
+        self._end = 0
+
+    @property
+    def text(self) -> str:
+        if self._document is None:
+            return self._text
+        return self._document.text[self._start:self._end]
+
+    def attach(self, document: "ExtractedDocument", start: int, end: int):
+        self._document = document
+        self._start = start
+        self._end = end
+        self._text = None
+
+    def to_dict(self) -> Dict[str, any]:
+        page = {"page": self.page, "text": self.text, "char_count": self.char_count, "ocr_used": self.ocr_used}
+        for field in ("original_char_count", "ocr_error", "error"):
+            if getattr(self, field) is not None:
+                page[field] = getattr(self, field)
+        return page
+
+    def __getstate__(self):
+        state = {field: getattr(self, field) for field in self.__slots__ if field not in ("_document", "_start", "_end")}
+        state["_text"] = self.text
+        return state
+
+    def __setstate__(self, state):
+        self._document = None
+        for field, value in state.items():
+            setattr(self, field, value)
+
+
+class ExtractedDocument(MutableMapping):
+    """
+    A successfully extracted PDF. The page texts are joined once into a single text buffer with a page
+    offset index; char/word/OCR counts are derived on access instead of being stored. Behaves like the
+    extraction result dict it replaces, so callers can keep using result["text"] or result.get(...).
+    """
+
+    __slots__ = ("text", "pages", "page_count", "metadata", "_fields")
+
+    STORED = ("text", "pages", "page_count", "metadata")
+    DERIVED = ("success", "char_count", "word_count", "ocr_pages_count", "error")
+
+    def __init__(self, pages: List[PageText], page_count: int, metadata: Dict):
+        buffer = "\n".join(page.text for page in pages)
+        stripped = buffer.strip()
+        lead = len(buffer) - len(buffer.lstrip())
+        self.text = stripped
+        self.pages = pages
+        self.page_count = page_count
+        self.metadata = metadata
+        self._fields = {}
 
-        if len(page_text.strip()) < 50:
-            try:
-
-                mat = fitz.Matrix(2, 2)
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-
-                image = Image.open(io.BytesIO(img_data))
-                
-
-                ocr_text = pytesseract.image_to_string(image, config='--psm 6')
-                
-
-                combined_text = page_text + "\n" + ocr_text if page_text.strip() else ocr_text
-                
-                return {
-                    "page": page_num + 1,
-                    "text": combined_text.strip(),
-                    "char_count": len(combined_text),
-                    "ocr_used": True,
-                    "original_char_count": len(page_text)
-                }
-            except Exception as ocr_error:
-
-                return {
-                    "page": page_num + 1,
-                    "text": page_text.strip(),
-                    "char_count": len(page_text),
-                    "ocr_used": False,
-                    "ocr_error": str(ocr_error)
-                }
+        offset = -lead
+        for page in pages:
+            length = len(page.text)
+            start = min(max(offset, 0), len(stripped))
+            page.attach(self, start, min(max(offset + length, 0), len(stripped)))
+            offset += length + 1
+
+    @property
+    def success(self) -> bool:
+        return True
+
+    @property
+    def error(self) -> Optional[str]:
+        return None
+
+    @property
+    def char_count(self) -> int:
+        return len(self.text)
+
+    @property
+    def word_count(self) -> int:
+        # Counted without materializing a list of words
+        return sum(1 for _ in re.finditer(r"\S+", self.text))
+
+    @property
+    def ocr_pages_count(self) -> int:
+        return sum(1 for page in self.pages if page.ocr_used)
+
+    def __getitem__(self, key: str):
+        if key in self.STORED or key in self.DERIVED:
+            return getattr(self, key)
+        return self._fields[key]
+
+    def __setitem__(self, key: str, value):
+        if key in self.DERIVED:
+            raise KeyError(f"{key} is derived and cannot be set")
+        if key in self.STORED:
+            setattr(self, key, value)
         else:
-            return {
-                "page": page_num + 1,
-                "text": page_text.strip(),
-                "char_count": len(page_text),
-                "ocr_used": False
-            }
+            self._fields[key] = value
+
+    def __delitem__(self, key: str):
+        del self._fields[key]
+
+    def __iter__(self):
+        yield from self.STORED
+        yield from self.DERIVED
+        yield from self._fields
+
+    def __len__(self) -> int:
+        return len(self.STORED) + len(self.DERIVED) + len(self._fields)
+
+    def to_dict(self) -> Dict[str, any]:
+        document = dict(self.items())
+        document["pages"] = [page.to_dict() for page in self.pages]
+        return document
+
+
+def extraction_to_dict(result) -> Dict[str, any]:
+    """JSON-ready dict for an extraction result, whether an ExtractedDocument or a plain (failed or cached) dict."""
+    if isinstance(result, ExtractedDocument):
+        return result.to_dict()
+    return result
+
+
+def extraction_succeeded(result) -> bool:
+    """True when every page of the document was read and OCR'd without error, so the result is safe to cache."""
+    if not result.get("success"):
+        return False
+    for page in result.get("pages") or []:
+        if isinstance(page, dict):
+            if page.get("ocr_error") or page.get("error"):
+                return False
+        elif page.ocr_error or page.error:
+            return False
+    return True
+
+
+def _page_text_result(page_num: int, page_text: str) -> PageText:
+    return PageText(page_num + 1, page_text.strip(), len(page_text))
+
+
+def _apply_ocr_text(page_result: PageText, page_text: str, ocr_text: str):
+    combined_text = page_text + "\n" + ocr_text if page_text.strip() else ocr_text
+    page_result._text = combined_text.strip()
+    page_result.char_count = len(combined_text)
+    page_result.ocr_used = True
+    page_result.original_char_count = len(page_text)
+
+
+def render_page_for_ocr(page) -> tuple:
+    """
+    Render a page at 2x as a grayscale pixmap and return its raw samples as (samples, width, height, stride, n).
+    The buffer goes straight to the OCR worker, so no PNG is encoded or decoded.
+    """
+    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), colorspace=fitz.csGRAY)
+    return (pix.samples, pix.width, pix.height, pix.stride, pix.n)
+
+
+def get_ocr_engine() -> str:
+    if OCR_ENGINE == "tesserocr" and tesserocr is None:
+        return "pytesseract"
+    return OCR_ENGINE
+
+
+def get_ocr_settings() -> str:
+    return f"{get_ocr_engine()}:{OCR_LANGUAGE}:psm6:2x-gray"
+
+
+def get_extraction_settings() -> Dict[str, any]:
+    """Settings that change extracted text, used to key cached extraction results."""
+    return {"ocr": get_ocr_settings(), "ocr_min_text_chars": OCR_MIN_TEXT_CHARS}
+
+
+def _get_tesseract_api():
+    # One resident engine per thread; language models are loaded once, not once per page
+    api = getattr(_tesseract_engines, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=OCR_LANGUAGE, psm=tesserocr.PSM.SINGLE_BLOCK)
+        _tesseract_engines.api = api
+    return api
+
+
+def ocr_pixmap_samples(samples: bytes, width: int, height: int, stride: int, n: int) -> str:
+    if get_ocr_engine() == "tesserocr":
+        api = _get_tesseract_api()
+        api.SetImageBytes(samples, width, height, n, stride)
+        text = api.GetUTF8Text()
+        api.Clear()
+        return text
+    
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}[n]
+    image = Image.frombuffer(mode, (width, height), samples, "raw", mode, stride, 1)
+    return pytesseract.image_to_string(image, lang=OCR_LANGUAGE, config='--psm 6')
+
+
+def extract_page_text(page, page_num: int) -> tuple:
+    """
+    Extract a page's text layer. Pages with less than OCR_MIN_TEXT_CHARS characters also get a rendered pixmap for OCR.
+
+    Returns:
+        (page_result, pixmap) where pixmap is None unless the page needs OCR
+    """
+    try:
+        page_text = page.get_text()
+        page_result = _page_text_result(page_num, page_text)
+        if len(page_text.strip()) >= OCR_MIN_TEXT_CHARS:
+            return page_result, None
+        
+        try:
+            pixmap = render_page_for_ocr(page)
+        except Exception as render_error:
+            page_result.ocr_error = str(render_error)
+            return page_result, None
+        page_result._raw_text = page_text
+        return page_result, pixmap
     except Exception as e:
-        return {
-            "page": page_num + 1,
-            "text": "",
-            "char_count": 0,
-            "ocr_used": False,
-            "error": str(e)
-        }
+        return PageText(page_num + 1, "", 0, error=str(e)), None
+
+
+def extract_text_with_ocr_fallback(page, page_num: int) -> Dict[str, any]:
+    page_result, pixmap = extract_page_text(page, page_num)
+    if pixmap is not None:
+        future = Future()
+        try:
+            future.set_result({"text": ocr_pixmap_samples(*pixmap)})
+        except Exception as ocr_error:
+            future.set_exception(ocr_error)
+        _finish_ocr_page(page_result, future)
+    return page_result.to_dict()
+
+
+def _assemble_extraction(page_texts: List[PageText], page_count: int, metadata: Dict) -> ExtractedDocument:
+    return ExtractedDocument(page_texts, page_count, metadata)
 
 def extract_text_with_metadata(pdf_path: str) -> Dict[str, any]:
     try:
@@ -90,33 +317,20 @@ def extract_text_with_metadata(pdf_path: str) -> Dict[str, any]:
             }
         
         doc = fitz.open(pdf_path)
-        text = ""
         page_texts = []
-        ocr_pages_count = 0
-        
+        ocr_pages = []
         for page_num, page in enumerate(doc):
-            page_result = extract_text_with_ocr_fallback(page, page_num)
-            text += page_result["text"] + "\n"
+            page_result, pixmap = extract_page_text(page, page_num)
             page_texts.append(page_result)
-            
-            if page_result.get("ocr_used", False):
-                ocr_pages_count += 1
-        
+            if pixmap is not None:
+                ocr_pages.append((page_result, _submit_ocr(pixmap)))
+        for page_result, future in ocr_pages:
+            _finish_ocr_page(page_result, future)
         metadata = doc.metadata
         page_count = doc.page_count
         doc.close()
         
-        return {
-            "success": True,
-            "text": text.strip(),
-            "page_count": page_count,
-            "pages": page_texts,
-            "metadata": metadata,
-            "char_count": len(text),
-            "word_count": len(text.split()) if text else 0,
-            "ocr_pages_count": ocr_pages_count,
-            "error": None
-        }
+        return _assemble_extraction(page_texts, page_count, metadata)
     
     except Exception as e:
         return {
@@ -141,30 +355,313 @@ def extract_text_from_multiple_pdfs(pdf_paths: List[str]) -> List[Dict[str, any]
     return results
 
 
-def extract_text_from_files_list(files: List[Dict[str, str]]) -> List[Dict[str, any]]:
-    results = []
+def _missing_file_result(file_info: Dict[str, str], local_path: str) -> Dict[str, any]:
+    return {
+        "file_id": file_info.get("id", ""),
+        "filename": file_info.get("name", ""),
+        "filepath": local_path,
+        "success": False,
+        "text": "",
+        "page_count": 0,
+        "error": "File not found or path empty"
+    }
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> Dict[str, any]:
+    # Runs in a pool worker; each task opens its own document handle. Pages needing OCR come back
+    # with their raw pixmap so the parent can hand them to the OCR pool
+    started = time.perf_counter()
+    doc = fitz.open(pdf_path)
+    try:
+        pages = [extract_page_text(doc[page_num], page_num) for page_num in range(start, end)]
+    finally:
+        doc.close()
+    return {"pages": pages, "worker_pid": os.getpid(), "seconds": time.perf_counter() - started}
+
+
+def get_extraction_pool(workers: int = PDF_EXTRACT_WORKERS) -> ProcessPoolExecutor:
+    global _extraction_pool
+    
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            # spawn rather than fork: the API process runs threads and holds sockets
+            _extraction_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            print(f"Started PDF extraction pool with {workers} worker processes")
+        return _extraction_pool
+
+
+def close_extraction_pool():
+    global _extraction_pool
+    
+    global _ocr_pool, _ocr_cache
+    
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(wait=True, cancel_futures=True)
+            _extraction_pool = None
+            print("PDF extraction pool closed")
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=True, cancel_futures=True)
+            _ocr_pool = None
+            print("OCR pool closed")
+        if _ocr_cache is not None:
+            _ocr_cache.close()
+            _ocr_cache = None
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor):
+    global _extraction_pool, _ocr_pool
+    
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+        if _ocr_pool is pool:
+            _ocr_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_to_pool(get_pool: Callable[[], ProcessPoolExecutor], fn: Callable, *args) -> Future:
+    """
+    Submit fn to the pool returned by get_pool. A worker that crashed (e.g. in the native OCR engine) leaves
+    its pool broken for good, so a broken pool is discarded and the task is submitted once more to a new one.
+    """
+    pool = get_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        print("Process pool is broken after a worker crashed, starting a new one")
+        _discard_broken_pool(pool)
+        return get_pool().submit(fn, *args)
+
+
+def _record_worker_time(worker_pid: int, pages: int, seconds: float):
+    with _worker_stats_lock:
+        stats = _worker_stats.setdefault(worker_pid, {"tasks": 0, "pages": 0, "busy_seconds": 0.0})
+        stats["tasks"] += 1
+        stats["pages"] += pages
+        stats["busy_seconds"] += seconds
+
+
+def get_extraction_stats() -> Dict[str, any]:
+    with _worker_stats_lock:
+        workers = {str(pid): dict(stats, busy_seconds=round(stats["busy_seconds"], 3)) for pid, stats in _worker_stats.items()}
+    pages = sum(stats["pages"] for stats in workers.values())
+    busy_seconds = sum(stats["busy_seconds"] for stats in workers.values())
+    return {
+        "pool_workers": PDF_EXTRACT_WORKERS,
+        "pages_per_task": PDF_PAGES_PER_TASK,
+        "pages": pages,
+        "pages_per_busy_second": round(pages / busy_seconds, 2) if busy_seconds else 0,
+        "workers": workers
+    }
+
+
+def _init_ocr_worker():
+    if get_ocr_engine() == "tesserocr":
+        _get_tesseract_api()
+
+
+def _ocr_task(samples: bytes, width: int, height: int, stride: int, n: int) -> Dict[str, any]:
+    started = time.perf_counter()
+    text = ocr_pixmap_samples(samples, width, height, stride, n)
+    return {"text": text, "worker_pid": os.getpid(), "seconds": time.perf_counter() - started}
+
+
+def get_ocr_pool(workers: int = OCR_WORKERS) -> ProcessPoolExecutor:
+    global _ocr_pool
     
-    for file_info in files:
+    with _extraction_pool_lock:
+        if _ocr_pool is None:
+            # One tesseract thread per process; the pool itself provides the parallelism. libgomp reads this once,
+            # when tesserocr is loaded by the worker's import of this module, so it has to be in the environment
+            # the spawned workers inherit; setting it in the worker initializer is too late
+            os.environ["OMP_THREAD_LIMIT"] = "1"
+            _ocr_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_ocr_worker)
+            print(f"Started OCR pool with {workers} worker processes using {get_ocr_engine()}")
+        return _ocr_pool
+
+
+def get_ocr_cache() -> Optional[OcrCache]:
+    global _ocr_cache
+    
+    if not OCR_CACHE_ENABLED:
+        return None
+    with _extraction_pool_lock:
+        if _ocr_cache is None:
+            _ocr_cache = OcrCache()
+        return _ocr_cache
+
+
+def _cache_ocr_result(cache: OcrCache, key: str, future: Future):
+    if future.exception() is None:
+        cache.put(key, future.result()["text"])
+
+
+def _submit_ocr(pixmap: tuple) -> Future:
+    cache = get_ocr_cache()
+    if cache is not None:
+        # Settings that change the OCR output are part of the key
+        key = ocr_cache_key(*pixmap, settings=get_ocr_settings())
+        cached_text = cache.get(key)
+        if cached_text is not None:
+            future = Future()
+            future.set_result({"text": cached_text, "cached": True})
+            return future
+    
+    _ocr_slots.acquire()
+    with _ocr_stats_lock:
+        if _ocr_stats["first_submitted_at"] is None:
+            _ocr_stats["first_submitted_at"] = time.time()
+    
+    if OCR_WORKERS > 1:
+        try:
+            future = _submit_to_pool(get_ocr_pool, _ocr_task, *pixmap)
+        except Exception:
+            # _ocr_done never runs for a task that was not submitted
+            _ocr_slots.release()
+            raise
+    else:
+        future = Future()
+        try:
+            future.set_result(_ocr_task(*pixmap))
+        except Exception as e:
+            future.set_exception(e)
+    future.add_done_callback(_ocr_done)
+    if cache is not None:
+        future.add_done_callback(lambda done: _cache_ocr_result(cache, key, done))
+    return future
+
+
+def _ocr_done(future: Future):
+    _ocr_slots.release()
+    with _ocr_stats_lock:
+        _ocr_stats["last_completed_at"] = time.time()
+        if future.exception() is not None:
+            _ocr_stats["errors"] += 1
+            return
+        _ocr_stats["pages"] += 1
+        _ocr_stats["busy_seconds"] += future.result().get("seconds", 0)
+
+
+def _finish_ocr_page(page_result: PageText, future: Future):
+    page_text = page_result._raw_text or ""
+    page_result._raw_text = None
+    try:
+        _apply_ocr_text(page_result, page_text, future.result()["text"])
+    except Exception as ocr_error:
+        page_result.ocr_error = str(ocr_error)
+
+
+def get_ocr_stats() -> Dict[str, any]:
+    with _ocr_stats_lock:
+        stats = dict(_ocr_stats)
+    active_seconds = (stats["last_completed_at"] or 0) - (stats["first_submitted_at"] or 0)
+    return {
+        "pool_workers": OCR_WORKERS,
+        "engine": get_ocr_engine(),
+        "pages": stats["pages"],
+        "errors": stats["errors"],
+        "busy_seconds": round(stats["busy_seconds"], 3),
+        "pages_per_sec": round(stats["pages"] / active_seconds, 2) if active_seconds > 0 else 0,
+        "pages_per_worker_sec": round(stats["pages"] / stats["busy_seconds"], 2) if stats["busy_seconds"] else 0,
+        "cache": _ocr_cache.get_stats() if _ocr_cache is not None else None
+    }
+
+
+def _extract_files_parallel(files: List[Dict[str, str]], workers: int, pages_per_task: int) -> List[Dict[str, any]]:
+    results = [None] * len(files)
+    tasks = []
+    
+    for file_index, file_info in enumerate(files):
         local_path = file_info.get("local_path", "")
         if not local_path or not os.path.exists(local_path):
-            results.append({
-                "file_id": file_info.get("id", ""),
-                "filename": file_info.get("name", ""),
-                "filepath": local_path,
-                "success": False,
-                "text": "",
-                "page_count": 0,
-                "error": "File not found or path empty"
-            })
+            results[file_index] = _missing_file_result(file_info, local_path)
             continue
         
-        result = extract_text_with_metadata(local_path)
+        try:
+            doc = fitz.open(local_path)
+            page_count = doc.page_count
+            metadata = doc.metadata
+            doc.close()
+            # Large PDFs are split into page ranges so one document can use several cores
+            futures = [_submit_to_pool(lambda: get_extraction_pool(workers), _extract_page_range, local_path, start,
+                                       min(start + pages_per_task, page_count))
+                       for start in range(0, page_count, pages_per_task)]
+        except Exception as e:
+            results[file_index] = {"success": False, "text": "", "page_count": 0, "metadata": {}, "error": str(e)}
+            continue
+        
+        tasks.append((file_index, page_count, metadata, futures, time.perf_counter()))
+    
+    # OCR for a range is submitted as soon as the range is back, so OCR of early pages overlaps
+    # text extraction of later ones across all documents
+    extracted = []
+    for file_index, page_count, metadata, futures, submitted_at in tasks:
+        page_texts = []
+        ocr_pages = []
+        error = None
+        try:
+            for future in futures:
+                chunk = future.result()
+                _record_worker_time(chunk["worker_pid"], len(chunk["pages"]), chunk["seconds"])
+                for page_result, pixmap in chunk["pages"]:
+                    page_texts.append(page_result)
+                    if pixmap is not None:
+                        ocr_pages.append((page_result, _submit_ocr(pixmap)))
+        except Exception as e:
+            error = str(e)
+        extracted.append((file_index, page_count, metadata, page_texts, ocr_pages, len(futures), submitted_at, error))
+    
+    for file_index, page_count, metadata, page_texts, ocr_pages, page_ranges, submitted_at, error in extracted:
+        for page_result, future in ocr_pages:
+            _finish_ocr_page(page_result, future)
+        if error:
+            result = {"success": False, "text": "", "page_count": 0, "metadata": {}, "error": error}
+        else:
+            result = _assemble_extraction(page_texts, page_count, metadata)
+        result["extraction_seconds"] = round(time.perf_counter() - submitted_at, 3)
+        result["page_ranges"] = page_ranges
+        results[file_index] = result
+    
+    return results
+
+
+def extract_text_from_files_list(files: List[Dict[str, str]], workers: int = PDF_EXTRACT_WORKERS,
+                                 pages_per_task: int = PDF_PAGES_PER_TASK) -> List[Dict[str, any]]:
+    """
+    Extract text (with OCR fallback) from downloaded files, preserving input order.
+
+    With more than one worker, files are split into page ranges of pages_per_task pages and extracted on a
+    shared process pool, so both many small PDFs and a few very large ones spread across cores.
+
+    Args:
+        files: File dictionaries with id, name, download_link and local_path
+        workers: Process pool size; 1 extracts serially in the calling process
+        pages_per_task: Pages per pool task
+
+    Returns:
+        One extraction result per input file, in the same order
+    """
+    if workers > 1:
+        results = _extract_files_parallel(files, workers, pages_per_task)
+    else:
+        results = []
+        for file_info in files:
+            local_path = file_info.get("local_path", "")
+            if not local_path or not os.path.exists(local_path):
+                results.append(_missing_file_result(file_info, local_path))
+            else:
+                results.append(extract_text_with_metadata(local_path))
+    
+    for file_info, result in zip(files, results):
+        if "file_id" in result:
+            continue
         result["file_id"] = file_info.get("id", "")
         result["filename"] = file_info.get("name", "")
-        result["filepath"] = local_path
+        result["filepath"] = file_info.get("local_path", "")
         result["download_link"] = file_info.get("download_link", "")
-        
-        results.append(result)
+        result["sha256"] = file_info.get("sha256")
     
     return results
 
@@ -0,0 +1,352 @@
+import os
+import json
+import gzip
+import time
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STAGE_CACHE_CODEC = os.getenv("STAGE_CACHE_CODEC", "zstd" if zstandard else "gzip")
+STAGE_CACHE_LEVEL = int(os.getenv("STAGE_CACHE_LEVEL", "3"))
+STAGE_CACHE_ENABLED = os.getenv("STAGE_CACHE_ENABLED", "true").lower() == "true"
+STAGE_CACHE_PATH = os.getenv("STAGE_CACHE_PATH", "cache/stages")
+STAGE_CACHE_MAX_MB = float(os.getenv("STAGE_CACHE_MAX_MB", "2048"))
+STAGE_CACHE_MAX_AGE_HOURS = float(os.getenv("STAGE_CACHE_MAX_AGE_HOURS", "168"))
+# Bump when a stage's output format changes so older entries are never read
+STAGE_CACHE_VERSION = 1
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.npy"
+COLUMNS_FILES = {"zstd": "columns.json.zst", "gzip": "columns.json.gz"}
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=STAGE_CACHE_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=STAGE_CACHE_LEVEL)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _to_columns(records: List[Dict], skip: Optional[str] = None) -> tuple:
+    names = []
+    for record in records:
+        for name in record:
+            if name != skip and name not in names:
+                names.append(name)
+
+    # Keys absent from a record are listed by row so they are not restored as None
+    missing = {}
+    columns = {name: [] for name in names}
+    for row, record in enumerate(records):
+        for name in names:
+            if name not in record:
+                missing.setdefault(name, []).append(row)
+            columns[name].append(record.get(name))
+    return columns, missing
+
+
+def _uniform_vectors(records: List[Dict], vector_field: Optional[str]) -> bool:
+    if not vector_field or not records:
+        return False
+    first = records[0].get(vector_field)
+    return first is not None and all(len(record.get(vector_field) or ()) == len(first) for record in records)
+
+
+def save_stage_cache(path: str, records: List, meta: Optional[Dict] = None, vector_field: Optional[str] = None) -> bool:
+    """
+    Save one pipeline stage's output as a cache directory: the records' fields as compressed JSON columns,
+    the vector_field of every record as a float32 .npy matrix, and a small meta.json with meta and row counts.
+    The directory is written beside the target and swapped in, so a reader never sees a partial cache.
+    """
+    records = [dict(record) for record in records]
+    codec = "zstd" if STAGE_CACHE_CODEC == "zstd" and zstandard else "gzip"
+    has_vectors = _uniform_vectors(records, vector_field)
+    columns, missing = _to_columns(records, skip=vector_field if has_vectors else None)
+
+    tmp_path = f"{path}.tmp"
+    try:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        if has_vectors:
+            np.save(os.path.join(tmp_path, VECTORS_FILE),
+                    np.asarray([record[vector_field] for record in records], dtype=np.float32))
+
+        payload = json.dumps(columns, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(os.path.join(tmp_path, COLUMNS_FILES[codec]), "wb") as f:
+            f.write(_compress(payload, codec))
+
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(),
+                "count": len(records),
+                "codec": codec,
+                "vector_field": vector_field if has_vectors else None,
+                "missing": missing,
+                **(meta or {})
+            }, f, ensure_ascii=False)
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return True
+    except Exception as e:
+        print(f"Could not save stage cache {path}: {e}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return False
+
+
+def load_stage_cache(path: str, mmap_vectors: bool = True) -> Optional[Dict]:
+    """
+    Load a cache written by save_stage_cache. Returns {"meta": ..., "records": [...]}, or None if there is no
+    usable cache. With mmap_vectors each record's vector is a read-only row of the memory-mapped .npy file,
+    so vectors are neither parsed nor copied.
+    """
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, COLUMNS_FILES[meta["codec"]]), "rb") as f:
+            columns = json.loads(_decompress(f.read(), meta["codec"]))
+
+        names = list(columns)
+        records = [dict(zip(names, values)) for values in zip(*columns.values())] if names else \
+            [{} for _ in range(meta["count"])]
+        for name, rows in meta.get("missing", {}).items():
+            for row in rows:
+                del records[row][name]
+
+        vector_field = meta.get("vector_field")
+        if vector_field:
+            vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r" if mmap_vectors else None)
+            for record, vector in zip(records, vectors):
+                record[vector_field] = vector
+        return {"meta": meta, "records": records}
+    except Exception as e:
+        print(f"Could not load stage cache {path}: {e}")
+        return None
+
+
+def stage_cache_size(path: str) -> int:
+    # Files can vanish mid-scan while another thread replaces or evicts the entry
+    size = 0
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return 0
+    for name in names:
+        try:
+            size += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+    return size
+
+
+def stage_cache_key(stage: str, inputs, settings: Optional[Dict] = None) -> str:
+    """
+    Key a stage's output by everything that determines it: the stage, its inputs (content hashes or the key
+    of the stage that produced them) and the settings that change its result.
+    """
+    payload = json.dumps({"version": STAGE_CACHE_VERSION, "stage": stage, "inputs": inputs, "settings": settings or {}},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    Multi-entry cache of pipeline stage outputs, one save_stage_cache directory per key under path/<stage>/.
+    Entries older than max_age_hours are dropped, and the least recently used ones are evicted once the
+    cache exceeds max_mb. The size is tracked as entries are added, so the streaming ingest's per-document
+    entries do not rescan the whole cache on every put. Entries are read and written under a per-key lock
+    stripe, and the cache-wide lock only guards the counters and eviction, so concurrent ingest workers do
+    their cache I/O in parallel.
+    """
+
+    ENTRY_LOCK_STRIPES = 64
+
+    def __init__(self, path: str = STAGE_CACHE_PATH, max_mb: float = STAGE_CACHE_MAX_MB,
+                 max_age_hours: float = STAGE_CACHE_MAX_AGE_HOURS):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_hours * 3600
+        self._lock = threading.Lock()
+        self._entry_locks = [threading.Lock() for _ in range(self.ENTRY_LOCK_STRIPES)]
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        entries = self._entries()
+        self._size = sum(entry["size"] for entry in entries)
+        self._last_evict = 0.0
+        print(f"Opened stage cache at {path} ({len(entries)} entries, max {max_mb} MB, "
+              f"max age {max_age_hours} h)")
+
+    def _entry_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.path, stage, key)
+
+    def _entry_lock(self, stage: str, key: str) -> threading.Lock:
+        return self._entry_locks[hash((stage, key)) % len(self._entry_locks)]
+
+    def _entries(self) -> List[Dict]:
+        entries = []
+        for stage in os.listdir(self.path):
+            stage_path = os.path.join(self.path, stage)
+            if not os.path.isdir(stage_path):
+                continue
+            for key in os.listdir(stage_path):
+                entry_path = os.path.join(stage_path, key)
+                meta_path = os.path.join(entry_path, META_FILE)
+                # Skips the .tmp/.old directories of an entry being written and incomplete entries
+                if "." in key:
+                    continue
+                try:
+                    entries.append({
+                        "path": entry_path,
+                        "created": os.path.getmtime(meta_path),
+                        "last_used": os.path.getmtime(entry_path),
+                        "size": stage_cache_size(entry_path)
+                    })
+                except OSError:
+                    # Incomplete, or being replaced by a concurrent put
+                    continue
+        return entries
+
+    def get(self, stage: str, key: str) -> Optional[List]:
+        entry_path = self._entry_path(stage, key)
+        expired_size = 0
+        with self._entry_lock(stage, key):
+            meta_path = os.path.join(entry_path, META_FILE)
+            if os.path.exists(meta_path) and time.time() - os.path.getmtime(meta_path) > self.max_age_seconds:
+                expired_size = stage_cache_size(entry_path)
+                shutil.rmtree(entry_path, ignore_errors=True)
+            cached = load_stage_cache(entry_path)
+            if cached is not None:
+                # The entry directory's mtime records its last use for LRU eviction
+                os.utime(entry_path)
+
+        with self._lock:
+            if expired_size:
+                self._size -= expired_size
+                self._evictions += 1
+            if cached is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        print(f"Stage cache hit for {stage} ({len(cached['records'])} records)")
+        return cached["records"]
+
+    def put(self, stage: str, key: str, records: List, meta: Optional[Dict] = None,
+            vector_field: Optional[str] = None) -> bool:
+        entry_path = self._entry_path(stage, key)
+        with self._entry_lock(stage, key):
+            old_size = stage_cache_size(entry_path)
+            saved = save_stage_cache(entry_path, records, {"stage": stage, **(meta or {})}, vector_field)
+            size_change = stage_cache_size(entry_path) - old_size
+
+        with self._lock:
+            self._size += size_change
+            # A full scan only when the cache may be over budget, or hourly to drop expired entries
+            if self._size > self.max_bytes or time.time() - self._last_evict > 3600:
+                self._evict()
+        return saved
+
+    def _evict(self):
+        now = time.time()
+        self._last_evict = now
+        entries = []
+        for entry in self._entries():
+            if now - entry["created"] > self.max_age_seconds:
+                shutil.rmtree(entry["path"], ignore_errors=True)
+                self._evictions += 1
+            else:
+                entries.append(entry)
+
+        size = sum(entry["size"] for entry in entries)
+        for entry in sorted(entries, key=lambda entry: entry["last_used"]):
+            if size <= self.max_bytes:
+                break
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            size -= entry["size"]
+            self._evictions += 1
+        self._size = size
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries():
+                shutil.rmtree(entry["path"], ignore_errors=True)
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, any]:
+        with self._lock:
+            entries = self._entries()
+            lookups = self._hits + self._misses
+            return {
+                "path": self.path,
+                "entries": len(entries),
+                "size_mb": round(sum(entry["size"] for entry in entries) / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "max_age_hours": round(self.max_age_seconds / 3600, 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions
+            }
+
+
+_stage_cache = None
+_stage_cache_lock = threading.Lock()
+
+
+def get_stage_cache() -> Optional[StageCache]:
+    global _stage_cache
+
+    if not STAGE_CACHE_ENABLED:
+        return None
+    with _stage_cache_lock:
+        if _stage_cache is None:
+            _stage_cache = StageCache()
+        return _stage_cache
+
+
+def cached_stage(stage: str, key: str, compute: Callable[[], list], vector_field: Optional[str] = None,
+                 to_record: Callable = dict, should_cache: Optional[Callable[[list], bool]] = None) -> list:
+    """
+    Return a stage's cached output for key, or compute it and cache the result when the stage cache is on.
+    should_cache can reject a computed result, e.g. a failed extraction, so it is retried next time instead
+    of being served from the cache until it expires.
+    """
+    cache = get_stage_cache()
+    if cache is not None:
+        cached = cache.get(stage, key)
+        if cached is not None:
+            return cached
+
+    records = compute()
+    if cache is not None and (should_cache is None or should_cache(records)):
+        cache.put(stage, key, [to_record(record) for record in records], vector_field=vector_field)
+    return records
+
+
+def get_stage_cache_stats() -> Optional[Dict[str, any]]:
+    return _stage_cache.get_stats() if _stage_cache is not None else None
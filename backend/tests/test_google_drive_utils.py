@@ -0,0 +1,205 @@
+"""
+Download tests against a local http.server stand-in for Drive's download endpoint.
+
+Run from backend/:
+    python -m unittest discover tests
+"""
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google_drive_utils
+from manifest_utils import DownloadManifest
+
+
+class FakeDrive:
+    """
+    Serves files by id. Each file has a body, an ETag and a list of scripted responses consumed one per request:
+    "503" answers with that status, "truncate" sends only the first half of the body and drops the connection,
+    "ok" (also used once the script runs out) serves the file, honouring Range/If-Range.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def add(self, file_id: str, body: bytes, etag: str, script=()):
+        self.files[file_id] = {"body": body, "etag": etag, "script": list(script)}
+
+    def next_action(self, file_id: str) -> str:
+        with self.lock:
+            script = self.files[file_id]["script"]
+            return script.pop(0) if script else "ok"
+
+
+def make_handler(drive: FakeDrive):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            file_id = self.path.split("id=")[-1]
+            with drive.lock:
+                drive.requests.append({"id": file_id, "range": self.headers.get("Range"),
+                                       "if_range": self.headers.get("If-Range")})
+            if file_id not in drive.files:
+                self.send_error(404)
+                return
+
+            action = drive.next_action(file_id)
+            file = drive.files[file_id]
+            if action.isdigit():
+                self.send_error(int(action))
+                return
+
+            body = file["body"]
+            start = 0
+            range_header = self.headers.get("Range")
+            if range_header and self.headers.get("If-Range", file["etag"]) == file["etag"]:
+                start = int(range_header.split("=")[1].rstrip("-"))
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(body)}")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("ETag", file["etag"])
+            self.send_header("Content-Length", str(len(body) - start))
+            self.end_headers()
+
+            if action == "truncate":
+                self.wfile.write(body[start:start + (len(body) - start) // 2])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body[start:])
+
+    return Handler
+
+
+class DownloadDriveFileTest(unittest.TestCase):
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self.drive))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.folder = tempfile.mkdtemp(prefix="drive_test_")
+
+        self.saved = {name: getattr(google_drive_utils, name)
+                      for name in ("DRIVE_DOWNLOAD_URL", "DRIVE_BACKOFF_SECONDS", "DRIVE_MAX_RETRIES", "_manifest")}
+        google_drive_utils.DRIVE_DOWNLOAD_URL = f"http://127.0.0.1:{self.server.server_port}/uc?export=download"
+        google_drive_utils.DRIVE_BACKOFF_SECONDS = 0
+        google_drive_utils.DRIVE_MAX_RETRIES = 3
+        google_drive_utils._manifest = DownloadManifest(os.path.join(self.folder, "manifest.json"))
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(google_drive_utils, name, value)
+        google_drive_utils.close_drive_session()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def download(self, file_id: str, file_name: str = "report.pdf"):
+        return google_drive_utils.download_drive_file(file_id, file_name, self.folder, skip_unchanged=False)
+
+    def read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_retries_retryable_status(self):
+        body = os.urandom(300_000)
+        self.drive.add("flaky", body, '"v1"', script=["503", "503"])
+
+        result = self.download("flaky")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.read(result["local_path"]), body)
+        self.assertEqual(result["sha256"], hashlib.sha256(body).hexdigest())
+        self.assertEqual(len(self.drive.requests), 3)
+
+    def test_resumes_truncated_download_with_if_range(self):
+        # Half the body is more than one DRIVE_CHUNK_SIZE chunk, so the first attempt leaves one chunk on disk
+        body = os.urandom(3 * google_drive_utils.DRIVE_CHUNK_SIZE)
+        self.drive.add("big", body, '"v1"', script=["truncate"])
+
+        result = self.download("big")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.read(result["local_path"]), body)
+        self.assertEqual(result["sha256"], hashlib.sha256(body).hexdigest())
+        first, second = self.drive.requests
+        self.assertIsNone(first["range"])
+        self.assertEqual(second["range"], f"bytes={google_drive_utils.DRIVE_CHUNK_SIZE}-")
+        self.assertEqual(second["if_range"], '"v1"')
+        # The first half is not transferred twice
+        self.assertEqual(result["bytes"], len(body))
+
+    def test_changed_file_is_downloaded_again_instead_of_spliced(self):
+        old_body = os.urandom(3 * google_drive_utils.DRIVE_CHUNK_SIZE)
+        new_body = os.urandom(3 * google_drive_utils.DRIVE_CHUNK_SIZE)
+        self.drive.add("changing", old_body, '"v1"', script=["truncate"])
+
+        # The file changes between the truncated transfer and the resume
+        original_next_action = self.drive.next_action
+
+        def next_action(file_id):
+            action = original_next_action(file_id)
+            if action == "ok":
+                self.drive.files[file_id].update(body=new_body, etag='"v2"')
+            return action
+
+        self.drive.next_action = next_action
+        result = self.download("changing")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.read(result["local_path"]), new_body)
+        self.assertEqual(result["sha256"], hashlib.sha256(new_body).hexdigest())
+        self.assertIsNotNone(self.drive.requests[1]["range"])
+        self.assertEqual(self.drive.requests[1]["if_range"], '"v1"')
+
+    def test_partial_file_from_earlier_run_is_discarded(self):
+        body = os.urandom(500_000)
+        self.drive.add("stale", body, '"v2"')
+        with open(os.path.join(self.folder, "stale_report.pdf.part"), "wb") as f:
+            f.write(os.urandom(100_000))
+
+        result = self.download("stale")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.read(result["local_path"]), body)
+        self.assertEqual([request["range"] for request in self.drive.requests], [None])
+
+    def test_missing_file_fails_without_retrying(self):
+        result = self.download("missing")
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["local_path"], "")
+        self.assertEqual(len(self.drive.requests), 1)
+
+    def test_same_named_files_get_separate_paths(self):
+        first_body, second_body = os.urandom(200_000), os.urandom(200_000)
+        self.drive.add("first", first_body, '"a"')
+        self.drive.add("second", second_body, '"b"')
+
+        first = self.download("first", "notes.pdf")
+        second = self.download("second", "notes.pdf")
+
+        self.assertNotEqual(first["local_path"], second["local_path"])
+        self.assertEqual(self.read(first["local_path"]), first_body)
+        self.assertEqual(self.read(second["local_path"]), second_body)
+
+
+if __name__ == "__main__":
+    unittest.main()
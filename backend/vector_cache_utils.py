@@ -0,0 +1,268 @@
+import os
+import re
+import glob
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings")
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
+
+# Key file layout: header (magic, dims, generation of the vector file it describes), then fixed-size
+# (key, row) records appended as vectors are stored; row -1 marks an evicted key
+HEADER = struct.Struct("<4sIII")
+RECORD = struct.Struct("<16si")
+MAGIC = b"VEC1"
+GROW_ROWS = 1024
+COMPACT_MIN_RECORDS = 4096
+
+
+def vector_cache_key(text: str, model_id: str) -> bytes:
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).digest()[:RECORD.size - 4]
+
+
+class VectorCache:
+    """
+    Persistent content-addressed cache of embedding vectors for one model. Vectors are stored contiguously as
+    float32 rows of a memory-mapped file; a compact append-only key file maps hash(text, model id) to a row.
+    Least recently used rows are reused once the vectors exceed max_mb, and the key file is compacted when
+    it is mostly superseded records.
+    """
+
+    def __init__(self, model_id: str, path: str = EMBEDDING_CACHE_PATH, max_mb: float = EMBEDDING_CACHE_MAX_MB):
+        self.model_id = model_id
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._free_rows = []
+        self._next_row = 0
+        self._dims = 0
+        self._generation = 0
+        self._vectors = None
+        self._capacity = 0
+        self._log_records = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._compactions = 0
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self._name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id)
+        self._keys_path = os.path.join(path, f"{self._name}.keys")
+        self._load()
+        self._keys_file = open(self._keys_path, "ab")
+
+        print(f"Opened embedding cache for {model_id} at {path} ({len(self._entries)} vectors, "
+              f"{round(self._size_bytes() / 1024 / 1024, 2)} MB of {max_mb} MB)")
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"{self._name}.{generation}.f32")
+
+    def _size_bytes(self) -> int:
+        return len(self._entries) * self._dims * 4
+
+    def _max_rows(self) -> int:
+        return max(self.max_bytes // (self._dims * 4), 1) if self._dims else 0
+
+    def _load(self):
+        if not os.path.exists(self._keys_path):
+            return
+        try:
+            with open(self._keys_path, "rb") as f:
+                magic, dims, generation, _ = HEADER.unpack(f.read(HEADER.size))
+                data = f.read()
+            if magic != MAGIC:
+                raise ValueError("unrecognised key file")
+        except Exception as e:
+            print(f"Could not read embedding cache {self._keys_path}, starting empty: {e}")
+            self._reset_files()
+            return
+
+        self._dims = dims
+        self._generation = generation
+        self._open_vectors(os.path.getsize(self._vectors_path(generation)) // (dims * 4)
+                           if os.path.exists(self._vectors_path(generation)) else 0)
+
+        # A trailing partial record from an interrupted write is ignored
+        for offset in range(0, len(data) - RECORD.size + 1, RECORD.size):
+            key, row = RECORD.unpack_from(data, offset)
+            self._log_records += 1
+            if row < 0:
+                self._entries.pop(key, None)
+            elif row < self._capacity:
+                self._entries[key] = row
+                self._entries.move_to_end(key)
+
+        used = set(self._entries.values())
+        self._next_row = max(used) + 1 if used else 0
+        self._free_rows = [row for row in range(self._next_row) if row not in used]
+        self._remove_stale_vector_files()
+
+    def _reset_files(self):
+        for stale in [self._keys_path] + glob.glob(os.path.join(self.path, f"{glob.escape(self._name)}.*.f32")):
+            os.remove(stale)
+
+    def _remove_stale_vector_files(self):
+        current = self._vectors_path(self._generation)
+        for stale in glob.glob(os.path.join(self.path, f"{glob.escape(self._name)}.*.f32")):
+            if stale != current:
+                os.remove(stale)
+
+    def _open_vectors(self, capacity: int):
+        self._vectors = None
+        self._capacity = capacity
+        if capacity:
+            self._vectors = np.memmap(self._vectors_path(self._generation), dtype=np.float32, mode="r+",
+                                      shape=(capacity, self._dims))
+
+    def _grow(self):
+        capacity = min(max(self._capacity * 2, GROW_ROWS), self._max_rows())
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(self._vectors_path(self._generation), "ab") as f:
+            f.truncate(capacity * self._dims * 4)
+        self._open_vectors(capacity)
+
+    def _write_header(self, keys_file):
+        keys_file.write(HEADER.pack(MAGIC, self._dims, self._generation, 0))
+
+    def _allocate_row(self, records: List[bytes]) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._next_row < self._max_rows():
+            if self._next_row >= self._capacity:
+                self._grow()
+            self._next_row += 1
+            return self._next_row - 1
+
+        key, row = self._entries.popitem(last=False)
+        records.append(RECORD.pack(key, -1))
+        self._evictions += 1
+        return row
+
+    def _append_records(self, records: List[bytes]):
+        if records:
+            self._keys_file.write(b"".join(records))
+            self._keys_file.flush()
+            self._log_records += len(records)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return a copy of the cached vector for each text, or None where it is not cached."""
+        results = []
+        with self._lock:
+            for text in texts:
+                key = vector_cache_key(text, self.model_id)
+                row = self._entries.get(key)
+                if row is None:
+                    self._misses += 1
+                    results.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                self._hits += 1
+                results.append(np.array(self._vectors[row]))
+        return results
+
+    def put_many(self, texts: List[str], vectors):
+        if not texts:
+            return
+        with self._lock:
+            if not self._dims:
+                self._dims = len(vectors[0])
+                with open(self._keys_path, "wb") as keys_file:
+                    self._write_header(keys_file)
+
+            pending = OrderedDict()
+            for text, vector in zip(texts, vectors):
+                key = vector_cache_key(text, self.model_id)
+                if len(vector) == self._dims and key not in self._entries:
+                    pending[key] = vector
+            # A batch larger than the whole cache keeps only the vectors that fit
+            pending = list(pending.items())[-self._max_rows():]
+
+            tombstones = []
+            rows = []
+            for key, _ in pending:
+                rows.append(self._allocate_row(tombstones))
+                self._entries[key] = rows[-1]
+
+            # Evictions are logged before their rows are overwritten and vectors reach the file before the
+            # records that point at them, so a crash never leaves a key pointing at another text's vector
+            self._append_records(tombstones)
+            for (_, vector), row in zip(pending, rows):
+                self._vectors[row] = vector
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._append_records([RECORD.pack(key, row) for (key, _), row in zip(pending, rows)])
+
+            if self._log_records > 2 * len(self._entries) + COMPACT_MIN_RECORDS:
+                self._compact()
+
+    def compact(self):
+        with self._lock:
+            if self._dims:
+                self._compact()
+
+    def _compact(self):
+        """
+        Rewrite the live vectors contiguously (least recently used first) into a new generation of the vector
+        file, then atomically replace the key file. The old vector file is removed only after the switch.
+        """
+        old_generation = self._generation
+        self._generation += 1
+        live = list(self._entries.items())
+        capacity = min(max(len(live), GROW_ROWS), self._max_rows())
+
+        compacted = np.memmap(self._vectors_path(self._generation), dtype=np.float32, mode="w+",
+                              shape=(capacity, self._dims))
+        for new_row, (_, old_row) in enumerate(live):
+            compacted[new_row] = self._vectors[old_row]
+        compacted.flush()
+        del compacted
+
+        tmp_path = self._keys_path + ".tmp"
+        with open(tmp_path, "wb") as keys_file:
+            self._write_header(keys_file)
+            keys_file.write(b"".join(RECORD.pack(key, new_row) for new_row, (key, _) in enumerate(live)))
+        self._keys_file.close()
+        os.replace(tmp_path, self._keys_path)
+        self._keys_file = open(self._keys_path, "ab")
+
+        self._open_vectors(capacity)
+        os.remove(self._vectors_path(old_generation))
+        self._entries = OrderedDict((key, new_row) for new_row, (key, _) in enumerate(live))
+        self._free_rows = []
+        self._next_row = len(live)
+        self._log_records = len(live)
+        self._compactions += 1
+        print(f"Compacted embedding cache for {self.model_id} to {len(live)} vectors")
+
+    def close(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._vectors = None
+            self._keys_file.close()
+
+    def get_stats(self) -> Dict[str, any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "model_id": self.model_id,
+                "path": self.path,
+                "entries": len(self._entries),
+                "dims": self._dims,
+                "size_mb": round(self._size_bytes() / 1024 / 1024, 2),
+                "file_mb": round(self._capacity * self._dims * 4 / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions,
+                "compactions": self._compactions
+            }
@@ -84,12 +84,12 @@ def ingest():
             flash("Please enter a Google Drive URL", "error")
             return render_template('ingest.html')
         
-        result = post_api_data("/ingest", {"google_drive_url": google_drive_url})
+        job = post_api_data("/ingest", {"google_drive_url": google_drive_url})
         
-        if result:
-            flash(f"Ingestion completed: {result.get('message', 'Success')}", "success")
+        if job:
+            flash(f"Ingestion started: {job.get('message', 'Job queued')}", "success")
             return render_template('ingest.html', 
-                                 result=result, 
+                                 job=job, 
                                  google_drive_url=google_drive_url)
         else:
             flash("Error during document ingestion", "error")
@@ -145,12 +145,32 @@ def api_ingest():
     if not google_drive_url:
         return jsonify({"error": "Google Drive URL is required"}), 400
     
-    result = post_api_data("/ingest", {"google_drive_url": google_drive_url})
+    job = post_api_data("/ingest", {"google_drive_url": google_drive_url})
     
-    if result:
-        return jsonify(result)
+    if job:
+        return jsonify(job), 202
+    else:
+        return jsonify({"error": "Failed to start document ingestion"}), 500
+
+@app.route('/api/ingest/<job_id>', methods=['GET'])
+def api_ingest_status(job_id):
+    """API endpoint for polling an ingest job"""
+    job = get_api_data(f"/ingest/{job_id}")
+    
+    if job:
+        return jsonify(job)
+    else:
+        return jsonify({"error": "Ingest job not found"}), 404
+
+@app.route('/api/ingest/<job_id>/cancel', methods=['POST'])
+def api_ingest_cancel(job_id):
+    """API endpoint for cancelling an ingest job"""
+    job = post_api_data(f"/ingest/{job_id}/cancel", {})
+    
+    if job:
+        return jsonify(job)
     else:
-        return jsonify({"error": "Failed to ingest documents"}), 500
+        return jsonify({"error": "Failed to cancel ingest job"}), 500
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)